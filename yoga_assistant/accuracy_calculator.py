@@ -1,64 +1,69 @@
-import json
 import numpy as np
 
-# --- Load the Pose Templates Database ---
-# This file must be in the same directory.
-try:
-    with open('pose_templates.json', 'r') as f:
-        POSE_TEMPLATES = json.load(f)
-except FileNotFoundError:
-    print("Error: `pose_templates.json` not found. Please create it.")
-    POSE_TEMPLATES = {}
+from pose_catalog import catalog
 
+_POSE_KEYS = {}
 
-def calculate_pose_accuracy(user_features: dict, detected_pose_name: str):
+
+def pose_key_for(detected_pose_name: str):
     # Sanitize the pose name to match the JSON keys (e.g., "Warrior II" -> "warrior_ii")
-    pose_key = detected_pose_name.lower().replace(" ", "_")
+    key = _POSE_KEYS.get(detected_pose_name)
+    if key is None:
+        key = _POSE_KEYS[detected_pose_name] = detected_pose_name.lower().replace(" ", "_")
+    return key
+
+
+def _summary_feedback(overall_accuracy):
+    return "Great form!" if overall_accuracy > 85 else "Good effort, a few adjustments can improve your form."
+
+
+def _angle_details(template, user_angles):
+    feedback_details = []
+    for name, label, user_angle, ideal_angle, threshold in zip(
+            template["angles"], template["labels"], user_angles, template["ideal_values"], template["threshold_values"]):
+        if np.isnan(user_angle):
+            continue
+        if abs(user_angle - ideal_angle) <= threshold:
+            feedback_details.append({
+                "angle": name,
+                "status": "correct",
+                "message": f"Your {label} is correct."
+            })
+        else:
+            direction = "extend" if user_angle < ideal_angle else "bend"
+            diff = round(abs(user_angle - ideal_angle))
+            feedback_details.append({
+                "angle": name,
+                "status": "incorrect",
+                "message": f"Try to {direction} your {label} by about {diff} degrees."
+            })
+    return feedback_details
+
+
+def calculate_pose_accuracy(user_features: dict, detected_pose_name: str):
+    template = catalog.compiled_templates().get(pose_key_for(detected_pose_name))
 
-    if pose_key not in POSE_TEMPLATES:
+    if template is None:
         return {
             "accuracy": 0,  # Default to 0 if no template exists
             "feedback": "No template available for this pose.",
             "details": []
         }
 
-    template = POSE_TEMPLATES[pose_key]
-    template_angles = template.get('angles', {})
+    user_angles = [user_features.get(name) for name in template["angles"]]
+    user_angles = [np.nan if angle is None else angle for angle in user_angles]
+    feedback_details = _angle_details(template, user_angles)
 
     total_error = 0
     angles_compared = 0
-    feedback_details = []
-
-    for angle_name, template_values in template_angles.items():
-        user_angle = user_features.get(angle_name)
-
-        if user_angle is not None and not np.isnan(user_angle):
-            ideal_angle = template_values['ideal']
-            threshold = template_values['threshold']
-
-            error = abs(user_angle - ideal_angle)
-
-            if error <= threshold:
-                normalized_error = 0
-                feedback_details.append({
-                    "angle": angle_name,
-                    "status": "correct",
-                    "message": f"Your {angle_name.replace('_', ' ')} is correct."
-                })
-            else:
-                # Calculate a normalized error score (0-100) for how far off the angle is.
-                # This makes large deviations more impactful than small ones.
-                normalized_error = min(100, ((error - threshold) / 90) * 100)
-                direction = "extend" if user_angle < ideal_angle else "bend"
-                diff = round(abs(user_angle - ideal_angle))
-                feedback_details.append({
-                    "angle": angle_name,
-                    "status": "incorrect",
-                    "message": f"Try to {direction} your {angle_name.replace('_', ' ')} by about {diff} degrees."
-                })
-
-            total_error += normalized_error
-            angles_compared += 1
+    for user_angle, ideal_angle, threshold in zip(user_angles, template["ideal_values"], template["threshold_values"]):
+        if np.isnan(user_angle):
+            continue
+        error = abs(user_angle - ideal_angle)
+        # Calculate a normalized error score (0-100) for how far off the angle is.
+        # This makes large deviations more impactful than small ones.
+        total_error += 0 if error <= threshold else min(100, ((error - threshold) / 90) * 100)
+        angles_compared += 1
 
     if angles_compared == 0:
         return {
@@ -71,6 +76,66 @@ def calculate_pose_accuracy(user_features: dict, detected_pose_name: str):
 
     return {
         "accuracy": round(overall_accuracy),
-        "feedback": "Great form!" if overall_accuracy > 85 else "Good effort, a few adjustments can improve your form.",
+        "feedback": _summary_feedback(overall_accuracy),
         "details": feedback_details
-    }
\ No newline at end of file
+    }
+
+
+def calculate_pose_accuracy_batch(angle_matrix, pose_names, angle_names, with_details=False):
+    """
+    Scores many frames at once. `angle_matrix` is (N, len(angle_names)) with NaN for unseen angles and
+    `pose_names[i]` is the detected pose of row i. Returns {"accuracy": (N,) array, "feedback": [str]},
+    plus "details" (per-angle messages) only when `with_details=True`. Per row, the values equal
+    those of `calculate_pose_accuracy`.
+    """
+    angle_matrix = np.asarray(angle_matrix, dtype=np.float64)
+    pose_names = np.asarray(pose_names)
+    n = len(angle_matrix)
+    accuracy = np.zeros(n)
+    feedback = [""] * n
+    details = [[] for _ in range(n)] if with_details else None
+    column = {name: i for i, name in enumerate(angle_names)}
+    compiled_templates = catalog.compiled_templates()
+
+    for pose_name in np.unique(pose_names):
+        rows = np.flatnonzero(pose_names == pose_name)
+        template = compiled_templates.get(pose_key_for(str(pose_name)))
+        if template is None:
+            for r in rows:
+                feedback[r] = "No template available for this pose."
+            continue
+
+        cols = [column.get(name) for name in template["angles"]]
+        user = np.full((len(rows), len(cols)), np.nan)
+        for j, c in enumerate(cols):
+            if c is not None:
+                user[:, j] = angle_matrix[rows, c]
+
+        valid = ~np.isnan(user)
+        error = np.abs(user - template["ideal"])
+        normalized = np.where(
+            error <= template["threshold"], 0.0,
+            np.minimum(100, ((error - template["threshold"]) / 90) * 100)
+        )
+        normalized = np.where(valid, normalized, 0.0)
+        # Accumulate column by column, in template order, to match the scalar summation exactly.
+        total_error = np.zeros(len(rows))
+        for j in range(len(cols)):
+            total_error = total_error + normalized[:, j]
+        angles_compared = valid.sum(axis=1)
+        compared = angles_compared > 0
+        overall_accuracy = 100 - total_error / np.maximum(angles_compared, 1)
+        accuracy[rows[compared]] = np.round(overall_accuracy[compared])
+
+        for k, r in enumerate(rows):
+            if not compared[k]:
+                feedback[r] = "Could not compare any angles for this pose."
+                continue
+            feedback[r] = _summary_feedback(overall_accuracy[k])
+            if with_details:
+                details[r] = _angle_details(template, user[k].tolist())
+
+    result = {"accuracy": accuracy, "feedback": feedback}
+    if with_details:
+        result["details"] = details
+    return result
@@ -0,0 +1,194 @@
+import datetime
+import json
+import os
+import queue
+import threading
+import uuid
+
+import database
+from database import AnalysisJob
+
+TERMINAL_STATES = ("done", "failed")
+
+
+class AnalysisJobManager:
+    """
+    Local in-process queue for long-running video analyses.
+    Jobs are picked up by dedicated worker threads; their status and progress are kept in memory
+    for polling/SSE. With `persist=True` every state change is also written to the `analysis_jobs`
+    table, and jobs that were queued or running when the server stopped are resumed on start().
+    """
+
+    def __init__(self, handler, workers=1, max_pending=32, persist=False, retention_seconds=3600):
+        # handler(video_path, user_id, report_progress) -> JSON-serialisable result
+        self._handler = handler
+        self._retention = datetime.timedelta(seconds=retention_seconds)
+        self._workers = workers
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.persist = persist
+
+    # --- Lifecycle ---
+    def start(self):
+        if self.persist:
+            self._resume_persisted()
+        for i in range(self._workers):
+            threading.Thread(target=self._worker, name=f"analysis-job-{i}", daemon=True).start()
+
+    def _resume_persisted(self):
+        db = database.SessionLocal()
+        try:
+            pending = db.query(AnalysisJob).filter(AnalysisJob.status.in_(["queued", "running"])).all()
+            for row in pending:
+                if not row.video_path or not os.path.exists(row.video_path):
+                    row.status, row.error = "failed", "Upload was lost during a server restart."
+                    continue
+                try:
+                    self._queue.put_nowait(row.id)
+                except queue.Full:
+                    row.status, row.error = "failed", "Job queue was full after a server restart."
+                    continue
+                row.status = "queued"
+                self._jobs[row.id] = self._row_to_state(row)
+            db.commit()
+        finally:
+            db.close()
+
+    # --- Public API ---
+    def submit(self, user_id, video_path):
+        """Queues a video for analysis. Raises queue.Full when too many jobs are pending."""
+        now = datetime.datetime.utcnow()
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "status": "queued",
+            "video_path": video_path,
+            "frames_processed": 0,
+            "total_frames": 0,
+            "poses_found": [],
+            "result": None,
+            "error": None,
+            "created_date": now,
+            "updated_date": now,
+            "version": 0,
+        }
+        with self._lock:
+            self._prune(now)
+            self._queue.put_nowait(job["id"])
+            self._jobs[job["id"]] = job
+            # Saved under the lock so a worker cannot persist "running" before "queued".
+            self._save(job)
+        return self.snapshot(job["id"], user_id)
+
+    def snapshot(self, job_id, user_id):
+        """Returns a public copy of the job, or None if it does not exist for this user."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            job = dict(job) if job else None
+        if job is None and self.persist:
+            job = self._load(job_id)
+        if job is None or job["user_id"] != user_id:
+            return None
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "frames_processed": job["frames_processed"],
+            "total_frames": job["total_frames"],
+            "poses_found": list(job["poses_found"]),
+            "result": job["result"],
+            "error": job["error"],
+            "version": job["version"],
+        }
+
+    def _prune(self, now):
+        """Forgets finished jobs after the retention period (persisted ones stay loadable)."""
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in TERMINAL_STATES and now - job["updated_date"] > self._retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    # --- Worker ---
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            job["updated_date"] = datetime.datetime.utcnow()
+            job["version"] += 1
+            return dict(job)
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            job = self._update(job_id, status="running")
+            self._try_save(job)
+
+            def report_progress(frames_processed, total_frames, poses_found):
+                self._update(job_id, frames_processed=frames_processed, total_frames=total_frames,
+                             poses_found=sorted(poses_found))
+
+            try:
+                result = self._handler(job["video_path"], job["user_id"], report_progress)
+                job = self._update(job_id, status="done", result=result)
+            except Exception as e:
+                print(f"Analysis job {job_id} failed: {e}")
+                job = self._update(job_id, status="failed", error=str(getattr(e, "detail", e)))
+            self._try_save(job)
+            self._queue.task_done()
+
+    # --- Persistence ---
+    def _try_save(self, job):
+        # A failed status write (e.g. a locked SQLite database) must not kill the worker thread;
+        # the in-memory state stays authoritative for polling and SSE.
+        try:
+            self._save(job)
+        except Exception as e:
+            print(f"Analysis job {job['id']}: could not save status '{job['status']}': {e}")
+
+    def _save(self, job):
+        if not self.persist:
+            return
+        db = database.SessionLocal()
+        try:
+            row = db.query(AnalysisJob).filter(AnalysisJob.id == job["id"]).first()
+            if row is None:
+                row = AnalysisJob(id=job["id"], user_id=job["user_id"], created_date=job["created_date"])
+                db.add(row)
+            row.status = job["status"]
+            row.video_path = job["video_path"]
+            row.frames_processed = job["frames_processed"]
+            row.total_frames = job["total_frames"]
+            row.result = json.dumps(job["result"]) if job["result"] is not None else None
+            row.error = job["error"]
+            row.updated_date = job["updated_date"]
+            db.commit()
+        finally:
+            db.close()
+
+    def _load(self, job_id):
+        db = database.SessionLocal()
+        try:
+            row = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            return self._row_to_state(row) if row else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _row_to_state(row):
+        result = json.loads(row.result) if row.result else None
+        return {
+            "id": row.id,
+            "user_id": row.user_id,
+            "status": row.status,
+            "video_path": row.video_path,
+            "frames_processed": row.frames_processed or 0,
+            "total_frames": row.total_frames or 0,
+            "poses_found": [r["pose"] for r in result.get("results", [])] if result else [],
+            "result": result,
+            "error": row.error,
+            "created_date": row.created_date,
+            "updated_date": row.updated_date,
+            "version": 0,
+        }
@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ArtifactNotReady(Exception):
+    """Raised when an artifact is still loading (or failed to load) and the caller won't wait."""
+
+
+class ArtifactLoader:
+    """
+    Loads named artifacts (models, encoders, landmarkers, ...) in parallel on background threads.
+    `start()` kicks off every load without blocking; otherwise each artifact is loaded on first
+    `get()`. Per-artifact state and load time are reported by `status()` for the readiness probe.
+    """
+
+    def __init__(self, loaders, max_workers=4):
+        self._loaders = loaders
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-loader")
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._timings = {}
+        self._errors = {}
+
+    def _load(self, name):
+        print(f"Loading {name}...")
+        started = time.perf_counter()
+        try:
+            value = self._loaders[name]()
+        except Exception as e:
+            self._errors[name] = str(e)
+            print(f"CRITICAL ERROR: Failed to load {name}: {e}")
+            raise
+        finally:
+            self._timings[name] = round(time.perf_counter() - started, 3)
+        print(f"Loaded {name} in {self._timings[name]:.2f}s")
+        return value
+
+    def _ensure(self, name):
+        with self._lock:
+            future = self._futures.get(name)
+            if future is None:
+                future = self._futures[name] = self._executor.submit(self._load, name)
+            return future
+
+    def start(self, names=None):
+        """Begins loading `names` (default: all) in the background and returns immediately."""
+        for name in names or self._loaders:
+            self._ensure(name)
+
+    def get(self, name, wait=True):
+        """Returns the loaded artifact, loading it now if needed. With wait=False, raises ArtifactNotReady."""
+        future = self._ensure(name)
+        if not wait and not future.done():
+            raise ArtifactNotReady(f"{name} is still loading")
+        try:
+            return future.result()
+        except Exception as e:
+            raise ArtifactNotReady(f"{name} failed to load: {e}") from e
+
+    def is_ready(self, names=None):
+        for name in names or self._loaders:
+            future = self._futures.get(name)
+            if future is None or not future.done() or future.exception() is not None:
+                return False
+        return True
+
+    def status(self):
+        report = {}
+        for name in self._loaders:
+            future = self._futures.get(name)
+            if future is None:
+                state = "not_loaded"
+            elif not future.done():
+                state = "loading"
+            elif future.exception() is not None:
+                state = "failed"
+            else:
+                state = "ready"
+            report[name] = {"state": state, "seconds": self._timings.get(name), "error": self._errors.get(name)}
+        return report
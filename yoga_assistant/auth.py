@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import OrderedDict
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
@@ -16,8 +19,17 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # --- Password Hashing ---
-# Using pbkdf2_sha256 for better compatibility across environments
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Using pbkdf2_sha256 for better compatibility across environments.
+# PASSWORD_HASH_ROUNDS sets the cost of new hashes; stored hashes with any other round count are
+# reported by `verify_and_update_password` and upgraded on the user's next successful login.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS,
+)
 
 class Token(BaseModel):
     access_token: str
@@ -27,12 +39,28 @@ class TokenData(BaseModel):
     username: Optional[str] = None
     user_id: Optional[int] = None
 
+class UserPrincipal(BaseModel):
+    """The authenticated user as handlers see it: identity only, no ORM session attached."""
+    id: int
+    username: str
+    email: Optional[str] = None
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """
+    (valid, new_hash): `new_hash` is a fresh hash with the current parameters when the password is
+    valid but `hashed_password` is outdated, else None. A missing hash costs as much as a real check.
+    """
+    if not hashed_password:
+        pwd_context.dummy_verify()
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -43,3 +71,101 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+# --- Verified Token Cache ---
+class InvalidToken(Exception):
+    """The token is malformed, expired, badly signed or names a user that no longer exists."""
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token -> UserPrincipal for tokens that already passed signature and user checks.
+    An entry lives until the token's own `exp` or `ttl_seconds`, whichever comes first, so a deleted
+    user or changed password is noticed within the TTL even without calling `invalidate_user`.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token -> (valid_until, principal)
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: UserPrincipal, expires_at: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (min(expires_at, time.time() + self.ttl_seconds), principal)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        """Call after deleting a user or changing their password."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+
+    def _drop(self, token):
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+token_cache = VerifiedTokenCache(
+    max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+)
+
+def principal_for_token(token: str, load_user):
+    """
+    Resolves a bearer token to a UserPrincipal, from the cache when possible. On a miss the JWT is
+    verified and `load_user(user_id)` (-> UserPrincipal or None) is called. Raises InvalidToken.
+    """
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise InvalidToken()
+    username = payload.get("sub")
+    user_id = payload.get("id")
+    if username is None or user_id is None:
+        raise InvalidToken()
+    token_data = TokenData(username=username, user_id=user_id)
+
+    principal = load_user(token_data.user_id)
+    if principal is None:
+        raise InvalidToken()
+    token_cache.put(token, principal, float(payload.get("exp", 0)))
+    return principal
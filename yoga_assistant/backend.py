@@ -1,30 +1,48 @@
 import cv2
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 import numpy as np
-import joblib
-import tempfile
 import os
 import datetime
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, status
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from fastapi.responses import JSONResponse, StreamingResponse
 import json
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # --- Local Modules ---
 import database
 import auth
+from migrations import run_migrations
 from database import User, YogaSession, JournalEntry, ChatHistory, CalendarPlan
 from accuracy_calculator import calculate_pose_accuracy
-from nlp_processor import analyze_feedback_text
-from yoga_assistant import crew
+from pose_catalog import catalog as pose_catalog
+from nlp_processor import analyze_feedback_batch
+from feedback_queue import FeedbackAnalyzer
+from pose_features import extract_features_from_image_bytes
+from video_analyzer import sample_frames, label_frames, PoseSegmenter
+from video_chunks import ChunkedVideoAnalyzer
+from landmarker_pool import LandmarkerPool, landmarker_options
+from bounded_pool import BoundedPool, PoolSaturated
+from analysis_jobs import AnalysisJobManager, TERMINAL_STATES
+from uploads import (
+    UploadLimitMiddleware, read_upload_limited, save_upload_to_disk,
+    MAX_IMAGE_UPLOAD_BYTES, MAX_VIDEO_UPLOAD_BYTES,
+)
+from artifact_loader import ArtifactLoader, ArtifactNotReady
+from pose_classifier import load_classifier
+from user_context import user_context_cache
+from response_cache import response_cache
+from pagination import paginate, parse_fields, NEXT_CURSOR_HEADER
+import progress_stats
+from bulk_writes import insert_rows
 
 # Load environment variables
 load_dotenv()
@@ -32,6 +50,7 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # --- Initialize DB ---
 database.Base.metadata.create_all(bind=database.engine)
+run_migrations(database.engine)
 
 # --- Authentication Dependency ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -43,144 +62,197 @@ def get_db():
     finally:
         db.close()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def load_user_principal(user_id: int):
+    db = database.SessionLocal()
     try:
-        payload = auth.jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
-        username: str = payload.get("sub")
-        user_id: int = payload.get("id")
-        if username is None or user_id is None:
-            raise credentials_exception
-        token_data = auth.TokenData(username=username, user_id=user_id)
-    except auth.JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == token_data.user_id).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        return auth.UserPrincipal(id=user.id, username=user.username, email=user.email)
+    finally:
+        db.close()
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    # Verified tokens are cached (bounded, TTL <= token expiry), so most requests skip both the JWT
+    # signature check and the users query. A miss does both, so it runs on the threadpool.
+    principal = auth.token_cache.get(token)
+    if principal is not None:
+        return principal
+    try:
+        return await run_in_threadpool(auth.principal_for_token, token, load_user_principal)
+    except auth.InvalidToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
 # --- Fast API Initialization ---
 app = FastAPI()
 
+# Added before CORS so that early 413 responses still carry the CORS headers.
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/upload-image/": MAX_IMAGE_UPLOAD_BYTES,
+        "/analyze-session/": MAX_VIDEO_UPLOAD_BYTES,
+        "/analyze-session/jobs": MAX_VIDEO_UPLOAD_BYTES,
+    },
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Supported for Vercel/Production deployment
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Serve static images
 if os.path.exists('reference_images'):
     app.mount("/images", StaticFiles(directory="reference_images"), name="images")
 
-# --- Global Model & Artifact Loading ---
-print("--- STARTING MODEL LOADING ---")
-try:
-    print("Loading Keras model...")
-    model = load_model(os.path.join('YOGA_NOTEBOOK', 'best_yoga_model.keras'))
-    print("Loading Label Encoder...")
-    le = joblib.load(os.path.join('YOGA_NOTEBOOK', 'label_encoder.pkl'))
-    print("Loading Scaler...")
-    scaler = joblib.load(os.path.join('YOGA_NOTEBOOK', 'scaler.pkl'))
-    print("Loading Imputer...")
-    imputer = joblib.load(os.path.join('YOGA_NOTEBOOK', 'col_means.pkl'))
-    
-    # --- Patch for scikit-learn version compatibility ---
-    # Newer versions of scikit-learn expect _fill_dtype on SimpleImputer
-    if not hasattr(imputer, '_fill_dtype'):
-        imputer._fill_dtype = np.float64
-    
-    print("Setting up MediaPipe landmarker...")
-    model_path = os.path.join('YOGA_NOTEBOOK', 'pose_landmarker_heavy.task')
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"MediaPipe task file '{model_path}' not found.")
-
-    BaseOptions = mp.tasks.BaseOptions
-    PoseLandmarker = mp.tasks.vision.PoseLandmarker
-    PoseLandmarkerOptions = mp.tasks.vision.PoseLandmarkerOptions
-    VisionRunningMode = mp.tasks.vision.RunningMode
-
-    options = PoseLandmarkerOptions(
-        base_options=BaseOptions(model_asset_path=model_path),
-        running_mode=VisionRunningMode.IMAGE,
-        min_pose_detection_confidence=0.5,
-        min_pose_presence_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-    landmarker = PoseLandmarker.create_from_options(options)
-    print("Models and artifacts loaded successfully.")
-except Exception as e:
-    print(f"CRITICAL ERROR: Failed to load models/artifacts: {e}")
-    model, le, scaler, imputer, landmarker = None, None, None, None, None
-
-import collections
-
-# --- Helper Functions ---
-def calculate_angle(a, b, c):
-    """Calculates the angle at point b given points a, b, and c."""
-    a, b, c = np.array(a), np.array(b), np.array(c)
-    ba, bc = a - b, c - b
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
-    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-    return np.degrees(np.arccos(cosine_angle))
-
-def extract_features_from_image_robust(image_path, landmarker, visibility_threshold=0.5):
+# --- Model & Artifact Loading ---
+# Heavy imports (TensorFlow, MediaPipe, CrewAI) happen inside the loaders, in parallel, in the
+# background, so the API (auth, history, dashboard) is serving while the models warm up.
+MODEL_DIR = 'YOGA_NOTEBOOK'
+
+# CLASSIFIER_BACKEND=numpy serves the exported MLP weights (pose_classifier.npz) with a pure-NumPy
+# forward pass; "keras" keeps the full TensorFlow stack.
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "keras").lower()
+
+def _load_classifier():
+    return load_classifier(CLASSIFIER_BACKEND, MODEL_DIR)
+
+def _landmarker_options(running_mode_name):
+    return landmarker_options(MODEL_DIR, running_mode_name)
+
+def _load_image_landmarker():
+    import mediapipe as mp
+    return mp.tasks.vision.PoseLandmarker.create_from_options(_landmarker_options("IMAGE"))
+
+def _load_video_landmarker_pool():
+    # Video sessions track the person across frames instead of re-detecting on every frame.
+    # Trackers are stateful, so each concurrent /analyze-session/ request leases its own.
+    import mediapipe as mp
+    video_options = _landmarker_options("VIDEO")
+    # One tracker is built here so the VIDEO-mode graph is loaded before /readyz reports ready.
+    return LandmarkerPool(
+        lambda: mp.tasks.vision.PoseLandmarker.create_from_options(video_options),
+        size=int(os.getenv("VIDEO_LANDMARKER_POOL_SIZE", "2"))
+    ).prewarm()
+
+# COACH_BACKEND=stub swaps CrewAI/Gemini for an offline, deterministic streaming coach.
+COACH_BACKEND = os.getenv("COACH_BACKEND", "crew").lower()
+
+def _load_coach():
+    if COACH_BACKEND == "stub":
+        from coach_stub import stub_crew
+        return stub_crew
+    if COACH_BACKEND == "crew":
+        from yoga_assistant import crew
+        return crew
+    raise ValueError(f"Unknown COACH_BACKEND '{COACH_BACKEND}' (expected 'crew' or 'stub').")
+
+artifacts = ArtifactLoader({
+    "classifier": _load_classifier,
+    "landmarker": _load_image_landmarker,
+    "video_landmarker_pool": _load_video_landmarker_pool,
+    "coach": _load_coach,
+}, max_workers=int(os.getenv("MODEL_LOAD_WORKERS", "4")))
+
+CLASSIFIER_ARTIFACTS = ["classifier"]
+IMAGE_ARTIFACTS = CLASSIFIER_ARTIFACTS + ["landmarker"]
+VIDEO_ARTIFACTS = CLASSIFIER_ARTIFACTS + ["video_landmarker_pool"]
+MODEL_ARTIFACTS = CLASSIFIER_ARTIFACTS + ["landmarker", "video_landmarker_pool"]
+
+# PRELOAD_MODELS=false defers every artifact to its first use (e.g. auth-only deployments).
+if os.getenv("PRELOAD_MODELS", "true").lower() in ("1", "true", "yes"):
+    print("--- STARTING MODEL LOADING (background) ---")
+    artifacts.start()
+
+def require_artifacts(names):
+    """Fails fast with 503 while the artifacts an endpoint needs are loading (or failed to load)."""
+    for name in names:
+        try:
+            artifacts.get(name, wait=False)
+        except ArtifactNotReady as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Server models are not ready yet ({e}).",
+                headers={"Retry-After": "10"},
+            )
+
+# --- Inference Pool ---
+# CV/ML work runs here so a long upload never blocks logins or dashboard reads on the event loop.
+inference_pool = BoundedPool(
+    max_workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+    max_queue=int(os.getenv("INFERENCE_QUEUE_SIZE", "8")),
+    thread_name_prefix="inference"
+)
+# The IMAGE-mode landmarker is shared by all pool workers; MediaPipe graphs are not re-entrant.
+image_landmarker_lock = threading.Lock()
+
+# --- Password Hashing Pool ---
+# PBKDF2 is deliberately CPU-heavy (and releases the GIL); a burst of logins or registrations runs on
+# a few dedicated threads and is shed with 503 beyond the queue, instead of stalling the event loop.
+password_pool = BoundedPool(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32")),
+    thread_name_prefix="password"
+)
+
+def run_password_hashing(fn, *args):
+    # Called from sync handlers: their DB work stays on FastAPI's threadpool, and the threadpool
+    # thread just waits here while the hash itself runs on (and is limited by) password_pool.
     try:
-        image = cv2.imread(image_path)
-        if image is None: return None
-        
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
-        detection_result = landmarker.detect(mp_image)
-
-        if not detection_result.pose_landmarks: return None
-        landmarks = detection_result.pose_landmarks[0]
-        features = {}
-
-        for i, lm in enumerate(landmarks):
-            features[f'landmark_{i}_x'] = lm.x
-            features[f'landmark_{i}_y'] = lm.y
-            features[f'landmark_{i}_z'] = lm.z
-            features[f'landmark_{i}_v'] = lm.visibility
-
-        IDX = {
-            'right_shoulder': 12, 'right_elbow': 14, 'right_wrist': 16,
-            'right_hip': 24,      'right_knee': 26,  'right_ankle': 28,
-            'left_shoulder': 11,  'left_elbow': 13,  'left_wrist': 15,
-            'left_hip': 23,       'left_knee': 25,   'left_ankle': 27
-        }
-        
-        def get_coords(index):
-            lm = landmarks[index]
-            return [lm.x, lm.y, lm.z] if lm.visibility > visibility_threshold else None
-
-        joints = {name: get_coords(idx) for name, idx in IDX.items()}
-        angle_defs = {
-            'angle_right_elbow': ('right_shoulder', 'right_elbow', 'right_wrist'),
-            'angle_left_elbow': ('left_shoulder', 'left_elbow', 'left_wrist'),
-            'angle_right_shoulder': ('right_hip', 'right_shoulder', 'right_elbow'),
-            'angle_left_shoulder': ('left_hip', 'left_shoulder', 'left_elbow'),
-            'angle_right_hip': ('right_shoulder', 'right_hip', 'right_knee'),
-            'angle_left_hip': ('left_shoulder', 'left_hip', 'left_knee'),
-            'angle_right_knee': ('right_hip', 'right_knee', 'right_ankle'),
-            'angle_left_knee': ('left_hip', 'left_knee', 'left_ankle')
-        }
+        return password_pool.call(fn, *args)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress. Please retry shortly.",
+            headers={"Retry-After": "2"},
+        )
 
-        for angle_name, (a, b, c) in angle_defs.items():
-            if joints[a] and joints[b] and joints[c]:
-                features[angle_name] = calculate_angle(joints[a], joints[b], joints[c])
-            else:
-                features[angle_name] = np.nan
-        return features
-    except Exception as e:
-        print(f"Extraction Error: {e}")
-        return None
+# --- Coach Executor ---
+# LLM round trips take seconds; they run on their own threads so the event loop (and the
+# inference pool) stay free. Each thread reuses its own Crew between queries.
+coach_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("COACH_WORKERS", "2")), thread_name_prefix="coach"
+)
+
+# Max rows per Keras forward pass on the video path; bounds memory on long clips.
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "256"))
+# "adaptive" samples between VIDEO_MIN_SAMPLE_FPS and VIDEO_MAX_SAMPLE_FPS depending on motion
+# (mean thumbnail difference, 0-255, between samples); "fixed" always samples at the max rate.
+VIDEO_SAMPLING = os.getenv("VIDEO_SAMPLING", "adaptive").lower()
+VIDEO_MIN_SAMPLE_FPS = float(os.getenv("VIDEO_MIN_SAMPLE_FPS", "1"))
+VIDEO_MAX_SAMPLE_FPS = float(os.getenv("VIDEO_MAX_SAMPLE_FPS", "4"))
+VIDEO_MOTION_LOW = float(os.getenv("VIDEO_MOTION_LOW", "2"))
+VIDEO_MOTION_HIGH = float(os.getenv("VIDEO_MOTION_HIGH", "6"))
+VIDEO_SAMPLING_SETTINGS = {
+    "mode": VIDEO_SAMPLING, "min_rate": VIDEO_MIN_SAMPLE_FPS, "max_rate": VIDEO_MAX_SAMPLE_FPS,
+    "low_motion": VIDEO_MOTION_LOW, "high_motion": VIDEO_MOTION_HIGH,
+}
+# VIDEO_DECODE_WORKERS > 1 splits clips of at least VIDEO_PARALLEL_MIN_SECONDS into time ranges
+# analyzed in that many worker processes, each loading its own landmarker and classifier.
+VIDEO_DECODE_WORKERS = int(os.getenv("VIDEO_DECODE_WORKERS", "1"))
+VIDEO_PARALLEL_MIN_SECONDS = float(os.getenv("VIDEO_PARALLEL_MIN_SECONDS", "120"))
+chunked_video = ChunkedVideoAnalyzer(
+    VIDEO_DECODE_WORKERS,
+    factory_args=(os.path.abspath(MODEL_DIR), CLASSIFIER_BACKEND),
+    min_chunk_seconds=float(os.getenv("VIDEO_MIN_CHUNK_SECONDS", "30"))
+) if VIDEO_DECODE_WORKERS > 1 else None
+# Sliding-window majority filter over per-frame predictions (in samples; odd) and the shortest
+# smoothed run that counts as a hold.
+VIDEO_SMOOTHING_WINDOW = int(os.getenv("VIDEO_SMOOTHING_WINDOW", "5"))
+VIDEO_MIN_HOLD_SECONDS = float(os.getenv("VIDEO_MIN_HOLD_SECONDS", "5"))
+# How often (in sampled frames) background jobs publish progress.
+PROGRESS_EVERY_SAMPLES = 16
+
+def predict_poses(features_matrix):
+    """Classifies a raw (N, F) feature matrix in one vectorized pass with the configured backend."""
+    return artifacts.get("classifier").predict(features_matrix)
 
 # --- Pydantic Models for Requests ---
 class UserRegister(BaseModel):
@@ -197,6 +269,7 @@ class JournalEntryRequest(BaseModel):
 
 class QueryModel(BaseModel):
     query: str
+    bypass_cache: bool = False # Force a fresh answer from the coach
 
 class PlanItem(BaseModel):
     title: str
@@ -206,6 +279,51 @@ class PlanItem(BaseModel):
 class ApprovePlanRequest(BaseModel):
     plans: list[PlanItem]
 
+# --- Pydantic Models for Responses ---
+# Everything but `id` is optional so `?fields=` projections validate; unrequested fields are omitted.
+class SessionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    user_id: int | None = None
+    pose_name: str | None = None
+    confidence_score: float | None = None
+    accuracy_score: float | None = None
+    feedback_text: str | None = None
+    feedback_notes: str | None = None
+    feedback_analysis: str | None = None
+    duration: int | None = None
+    date: datetime.datetime | None = None
+
+class JournalEntryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    user_id: int | None = None
+    entry_text: str | None = None
+    date: datetime.datetime | None = None
+
+class ChatHistoryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    user_id: int | None = None
+    user_query: str | None = None
+    bot_response: str | None = None
+    created_date: datetime.datetime | None = None
+
+class CalendarPlanOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    user_id: int | None = None
+    title: str | None = None
+    description: str | None = None
+    planned_date: datetime.datetime | None = None
+    status: str | None = None
+    session_id: int | None = None
+    created_date: datetime.datetime | None = None
+
+class CalendarOut(BaseModel):
+    sessions: list[SessionOut]
+    plans: list[CalendarPlanOut]
+
 # --- AUTH ENDPOINTS ---
 
 @app.post("/auth/register")
@@ -215,7 +333,7 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_pwd = auth.get_password_hash(user.password)
+    hashed_pwd = run_password_hashing(auth.get_password_hash, user.password)
     new_user = User(username=user.username, email=user.email, hashed_password=hashed_pwd)
     db.add(new_user)
     db.commit()
@@ -225,79 +343,290 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
 @app.post("/auth/token", response_model=auth.Token)
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    # Unknown usernames still pay for a hash check so response time does not reveal which exist.
+    valid, new_hash = run_password_hashing(
+        auth.verify_and_update_password, form_data.password, user.hashed_password if user else None
+    )
+    if not user or not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored hash predates the current PASSWORD_HASH_ROUNDS; upgrade it while we have the password.
+        user.hashed_password = new_hash
+        db.commit()
     access_token_expires = datetime.timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={"sub": user.username, "id": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+# --- Blocking Inference (runs on the inference pool, never on the event loop) ---
+
+def classify_image(image_bytes):
+    """Detects, classifies and scores the pose in an encoded image. Returns None if no pose is found."""
+    with image_landmarker_lock:
+        features_dict = extract_features_from_image_bytes(image_bytes, artifacts.get("landmarker"))
+    if features_dict is None:
+        return None
+
+    # Predict
+    features_list = list(features_dict.values())
+    pose_names, confidences = predict_poses(np.array([features_list]))
+    predicted_pose_name = pose_names[0]
+    confidence = float(confidences[0])
+
+    # Accuracy
+    pose_accuracy_data = calculate_pose_accuracy(
+        user_features=features_dict,
+        detected_pose_name=predicted_pose_name
+    )
+    return predicted_pose_name, confidence, pose_accuracy_data
+
+def analyze_video_file(video_path, on_progress=None):
+    """
+    Samples, classifies and scores every pose in a video file and segments the predictions into
+    holds. Returns (segments, duration_sec); see video_analyzer.PoseSegmenter for the segment dicts.
+    `on_progress(frames_processed, total_frames, poses_found)` is called periodically if given.
+    Long clips are split across the chunked video workers when VIDEO_DECODE_WORKERS > 1.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise HTTPException(status_code=400, detail="Invalid video file.")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration_sec = total_frames / fps if fps > 0 else 0
+
+    # Sample FOUR frames per second for ultra-precision; adaptive sampling drops towards
+    # VIDEO_MIN_SAMPLE_FPS while the picture is still and returns to the full rate on movement.
+    frames, sampler, frame_step = sample_frames(cap, fps, VIDEO_SAMPLING_SETTINGS)
+
+    segmenter = PoseSegmenter(fps, frame_step=frame_step, window=VIDEO_SMOOTHING_WINDOW)
+    segments = []
+    poses_found = {}
+
+    def add_segments(closed):
+        segments.extend(closed)
+        poses_found.update(dict.fromkeys(s["pose"] for s in closed))
+
+    def push_samples(samples):
+        for sample in samples:
+            add_segments(segmenter.push(*sample))
+
+    def with_progress(frames):
+        for sample_no, (frame_idx, frame) in enumerate(frames):
+            if on_progress and sample_no % PROGRESS_EVERY_SAMPLES == 0:
+                on_progress(frame_idx + 1, total_frames, list(poses_found))
+            yield frame_idx, frame
+
+    use_chunks = chunked_video is not None and duration_sec >= VIDEO_PARALLEL_MIN_SECONDS
+    print(f"--- Starting Analysis ({VIDEO_SAMPLING}, up to {VIDEO_MAX_SAMPLE_FPS:g}fps"
+          f"{f', {chunked_video.workers} workers' if use_chunks else ''}) for {total_frames} frames ({duration_sec:.1f}s) ---")
+    try:
+        if use_chunks:
+            cap.release()
+            last_step = frame_step
+            sample_count = 0
+            for end_frame, samples, last_step in chunked_video.iter_ranges(
+                    video_path, total_frames, fps, VIDEO_SAMPLING_SETTINGS, VIDEO_BATCH_SIZE):
+                push_samples(samples)
+                sample_count += len(samples)
+                if on_progress:
+                    on_progress(end_frame, total_frames, list(poses_found))
+            print(f"Chunked analysis: {sample_count} of {total_frames} frames analyzed")
+        else:
+            with artifacts.get("video_landmarker_pool").lease() as tracker:
+                push_samples(label_frames(
+                    with_progress(frames), tracker, fps, predict_poses, VIDEO_BATCH_SIZE
+                ))
+            last_step = sampler.interval if sampler else frame_step
+            if sampler:
+                print(f"Adaptive sampling: {sampler.samples} of {total_frames} frames analyzed")
+        add_segments(segmenter.finish(total_frames, last_step))
+        if on_progress:
+            on_progress(total_frames, total_frames, list(poses_found))
+    finally:
+        cap.release()
+    return segments, duration_sec
+
+def save_video_results(db, user_id, segments, duration_sec):
+    """Persists one YogaSession per pose held long enough and builds the /analyze-session/ response."""
+    if not segments:
+        raise HTTPException(status_code=400, detail="No recognizable yoga poses detected in the clip.")
+
+    holds = {}
+    for segment in segments:
+        if segment["duration"] < VIDEO_MIN_HOLD_SECONDS: # Too short to be a hold; transition noise
+            print(f"Skipping {segment['pose']} at {segment['start_sec']}s: {segment['duration']}s < {VIDEO_MIN_HOLD_SECONDS}s threshold")
+            continue
+        holds.setdefault(segment["pose"], []).append(segment)
+
+    results = []
+    rows = []
+    for pose_name, pose_segments in holds.items():
+        duration = round(sum(s["duration"] for s in pose_segments), 2)
+        accuracy_count = sum(s["accuracy_count"] for s in pose_segments)
+        avg_accuracy = sum(s["accuracy_sum"] for s in pose_segments) / accuracy_count if accuracy_count else 0.0
+        feedbacks = [s["feedback"] for s in pose_segments if s["feedback"]]
+        best_feedback = feedbacks[-1] if feedbacks else "Presence detected."
+
+        print(f"Aggregating: {pose_name} | Duration: {duration}s in {len(pose_segments)} hold(s) | Acc: {avg_accuracy:.1f}%")
+
+        # Save to DB
+        duration_int = int(round(duration))
+        rows.append({
+            "user_id": user_id,
+            "pose_name": pose_name,
+            "confidence_score": 0.0,
+            "accuracy_score": round(avg_accuracy),
+            "feedback_text": f"Held for {duration_int} seconds. {best_feedback}",
+            "duration": duration_int,
+            "date": datetime.datetime.utcnow()
+        })
+        results.append({
+            "pose": pose_name,
+            "accuracy": round(avg_accuracy),
+            "duration": duration_int,
+            "feedback": f"You held {pose_name} for {duration_int} seconds.",
+            "details": f"Form accuracy: {round(avg_accuracy)}%. {best_feedback}",
+            "segments": [{"start": s["start_sec"], "end": s["end_sec"]} for s in pose_segments],
+            "sessionId": None
+        })
+
+    # One multi-row INSERT ... RETURNING for all poses, so the response carries real session ids.
+    for result, session_id in zip(results, insert_rows(db, YogaSession, rows)):
+        result["sessionId"] = session_id
+    progress_stats.record_sessions(db, user_id, rows)
+    db.commit()
+    user_context_cache.invalidate(user_id)
+
+    return {
+        "total_duration": round(duration_sec),
+        "poses_detected": len(results),
+        "results": results
+    }
+
+def run_analysis_job(video_path, user_id, report_progress):
+    """Job-queue handler: analyzes an uploaded video and stores its sessions."""
+    try:
+        segments, duration_sec = analyze_video_file(video_path, on_progress=report_progress)
+        db = database.SessionLocal()
+        try:
+            return save_video_results(db, user_id, segments, duration_sec)
+        finally:
+            db.close()
+    finally:
+        if os.path.exists(video_path):
+            os.unlink(video_path)
+
+# Near-identical questions against unchanged history reuse an earlier answer instead of a
+# full CrewAI + Gemini round trip. RESPONSE_CACHE_ENABLED=false turns this off globally.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def lookup_coach_cache(data, user_id):
+    """Returns (cached answer or None, context fingerprint to store a fresh answer under, or None)."""
+    if not RESPONSE_CACHE_ENABLED:
+        return None, None
+    fingerprint = user_context_cache.fingerprint(user_id)
+    if fingerprint is None:
+        return None, None
+    if data.bypass_cache:
+        # Skip the lookup but still refresh the entry with the new answer.
+        response_cache.record_bypass()
+        return None, fingerprint
+    return response_cache.get(user_id, fingerprint, data.query), fingerprint
+
+def answer_coach_query(data, user_id, on_chunk=None):
+    """
+    Answers from the response cache or runs the coach (blocking), caches the answer and records
+    the exchange, even if the client has gone. Runs on coach_executor: the cache lookup may have to
+    rebuild the user's context snapshot, which queries the database. A cached answer is passed to
+    `on_chunk` as a single chunk.
+    """
+    user_query = data.query
+    cached, fingerprint = lookup_coach_cache(data, user_id)
+    if cached is not None:
+        if on_chunk:
+            on_chunk(cached)
+        record_chat(user_id, user_query, cached)
+        return cached
+
+    # result is a CrewOutput object, convert to string for DB
+    bot_response_text = str(artifacts.get("coach")(user_query, user_id, on_chunk=on_chunk))
+    if fingerprint is not None:
+        response_cache.put(user_id, fingerprint, user_query, bot_response_text)
+    record_chat(user_id, user_query, bot_response_text)
+    return bot_response_text
+
+def record_chat(user_id, user_query, bot_response_text):
+    db = database.SessionLocal()
+    try:
+        db.add(ChatHistory(
+            user_id=user_id,
+            user_query=user_query,
+            bot_response=bot_response_text,
+            created_date=datetime.datetime.utcnow()
+        ))
+        db.commit()
+    finally:
+        db.close()
+    user_context_cache.invalidate(user_id)
+
+async def run_inference(fn, *args):
+    """Dispatches blocking work to the inference pool, answering 503 when it is saturated."""
+    try:
+        return await inference_pool.run(fn, *args)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis workers are busy. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
 # --- APP ENDPOINTS ---
 
 @app.post("/upload-image/")
 async def upload_image(
         file: UploadFile = File(...),
-        current_user: User = Depends(get_current_user),
+        current_user: auth.UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     try:
-        if model is None or landmarker is None:
-             raise HTTPException(status_code=500, detail="Server models not initialized correctly.")
+        require_artifacts(IMAGE_ARTIFACTS)
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            tmp_path = tmp.name
-
-        features_dict = extract_features_from_image_robust(tmp_path, landmarker)
-        
-        if features_dict is None:
-            os.unlink(tmp_path)
+        # Decoded straight from memory (cv2.imdecode); no temp file needed for images.
+        contents = await read_upload_limited(file)
+        classification = await run_inference(classify_image, contents)
+        if classification is None:
             raise HTTPException(status_code=400, detail="No pose detected in the image.")
-
-        # Predict
-        features_list = list(features_dict.values())
-        features_array = np.array([features_list])
-        features_imputed = imputer.transform(features_array)
-        features_scaled = scaler.transform(features_imputed)
-        prediction = model.predict(features_scaled)
-        predicted_class_index = np.argmax(prediction)
-        predicted_pose_name = le.inverse_transform([predicted_class_index])[0]
-        confidence = float(np.max(prediction))
-
-        # Accuracy
-        pose_accuracy_data = calculate_pose_accuracy(
-            user_features=features_dict,
-            detected_pose_name=predicted_pose_name
-        )
+        predicted_pose_name, confidence, pose_accuracy_data = classification
 
         # Save to SQLite
-        new_session = YogaSession(
-            user_id=current_user.id,
-            pose_name=predicted_pose_name,
-            confidence_score=confidence,
-            accuracy_score=pose_accuracy_data.get("accuracy"),
-            feedback_text=pose_accuracy_data.get("feedback"),
-            date=datetime.datetime.utcnow()
-        )
-        db.add(new_session)
+        new_session = {
+            "user_id": current_user.id,
+            "pose_name": predicted_pose_name,
+            "confidence_score": confidence,
+            "accuracy_score": pose_accuracy_data.get("accuracy"),
+            "feedback_text": pose_accuracy_data.get("feedback"),
+            "duration": 0,
+            "date": datetime.datetime.utcnow()
+        }
+        # The id comes back from INSERT ... RETURNING; no refresh() round trip needed.
+        [session_id] = insert_rows(db, YogaSession, [new_session])
+        progress_stats.record_sessions(db, current_user.id, [new_session])
         db.commit()
-        db.refresh(new_session)
+        user_context_cache.invalidate(current_user.id)
 
-        os.unlink(tmp_path)
-        
         return {
             "pose": predicted_pose_name,
             "confidence_score": confidence,
             "accuracy": pose_accuracy_data.get("accuracy"),
             "feedback": pose_accuracy_data.get("feedback"),
             "details": pose_accuracy_data.get("details"),
-            "sessionId": new_session.id
+            "sessionId": session_id
         }
 
     except HTTPException as e:
@@ -309,141 +638,123 @@ async def upload_image(
 @app.post("/analyze-session/")
 async def analyze_session(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: auth.UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Analyzes a video clip, detects all poses, and calculates held duration for each."""
+    video_path = None
     try:
-        if model is None or landmarker is None:
-            raise HTTPException(status_code=500, detail="Server models not initialized.")
+        require_artifacts(VIDEO_ARTIFACTS)
 
-        # Save uploaded video to temp
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            video_path = tmp.name
+        # Copy the spooled upload to a named temp file for OpenCV
+        video_path = await save_upload_to_disk(file, suffix=".mp4")
 
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            os.unlink(video_path)
-            raise HTTPException(status_code=400, detail="Invalid video file.")
-
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration_sec = total_frames / fps if fps > 0 else 0
-        
-        # Sample FOUR frames per second for ultra-precision
-        sample_interval = max(int(fps / 4), 1)
-        
-        # Track statistics for ALL poses detected
-        pose_data = collections.defaultdict(lambda: {"count": 0, "accuracies": [], "feedbacks": []})
-        
-        print(f"--- Starting Analysis (Ultra-Res 4fps) for {total_frames} frames ({duration_sec:.1f}s) ---")
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_idx % sample_interval == 0:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as img_tmp:
-                    cv2.imwrite(img_tmp.name, frame)
-                    img_path = img_tmp.name
-                
-                features_dict = extract_features_from_image_robust(img_path, landmarker)
-                os.unlink(img_path)
-                
-                if features_dict:
-                    features_list = list(features_dict.values())
-                    features_array = np.array([features_list])
-                    features_imputed = imputer.transform(features_array)
-                    features_scaled = scaler.transform(features_imputed)
-                    prediction = model.predict(features_scaled)
-                    
-                    idx = np.argmax(prediction)
-                    conf = float(np.max(prediction))
-                    pose_name = le.inverse_transform([idx])[0]
-                    
-                    if conf > 0.45: # Lowered threshold to be more inclusive
-                        pose_data[pose_name]["count"] += 1
-                        pose_acc_data = calculate_pose_accuracy(features_dict, pose_name)
-                        pose_data[pose_name]["accuracies"].append(pose_acc_data.get("accuracy", 0))
-                        pose_data[pose_name]["feedbacks"].append(pose_acc_data.get("feedback", ""))
-                
-            frame_idx += 1
-        
-        cap.release()
-        os.unlink(video_path)
-        
-        if not pose_data:
-            raise HTTPException(status_code=400, detail="No recognizable yoga poses detected in the clip.")
-        
-        results = []
-        for pose_name, data in pose_data.items():
-            duration = round(data["count"] * 0.25, 2) # Multiplied by 0.25 because we sample 4 frames/sec
-            if duration < 10.0: # Minimum threshold of 10 seconds to filter out noise
-                print(f"Skipping {pose_name}: Duration {duration}s < 10s threshold")
-                continue
-                
-            avg_accuracy = sum(data["accuracies"]) / len(data["accuracies"])
-            best_feedback = data["feedbacks"][-1] if data["feedbacks"] else "Presence detected."
-            
-            print(f"Aggregating: {pose_name} | Duration: {duration}s | Acc: {avg_accuracy:.1f}%")
-            
-            # Save to DB
-            duration_int = int(round(duration))
-            new_session = YogaSession(
-                user_id=current_user.id,
-                pose_name=pose_name,
-                confidence_score=0.0,
-                accuracy_score=round(avg_accuracy),
-                feedback_text=f"Held for {duration_int} seconds. {best_feedback}",
-                duration=duration_int,
-                date=datetime.datetime.utcnow()
-            )
-            db.add(new_session)
-            results.append({
-                "pose": pose_name,
-                "accuracy": round(avg_accuracy),
-                "duration": duration_int,
-                "feedback": f"You held {pose_name} for {duration_int} seconds.",
-                "details": f"Form accuracy: {round(avg_accuracy)}%. {best_feedback}",
-                "sessionId": None
-            })
-
-        db.commit()
-        
-        return {
-            "total_duration": round(duration_sec),
-            "poses_detected": len(results),
-            "results": results
-        }
+        segments, duration_sec = await run_inference(analyze_video_file, video_path)
+        return save_video_results(db, current_user.id, segments, duration_sec)
 
     except HTTPException as e:
         raise e
     except Exception as e:
         print(f"Video Analysis Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if video_path:
+            os.unlink(video_path)
+
+# --- Background Video Analysis Jobs ---
+
+ANALYSIS_JOBS_DIR = os.getenv("ANALYSIS_JOBS_DIR", os.path.join("data", "analysis_jobs"))
+
+analysis_jobs = AnalysisJobManager(
+    run_analysis_job,
+    workers=int(os.getenv("ANALYSIS_JOB_WORKERS", "1")),
+    max_pending=int(os.getenv("ANALYSIS_JOB_QUEUE_SIZE", "32")),
+    persist=os.getenv("ANALYSIS_JOBS_PERSIST", "false").lower() in ("1", "true", "yes")
+)
+analysis_jobs.start()
+
+@app.post("/analyze-session/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_analysis_job(
+    file: UploadFile = File(...),
+    current_user: auth.UserPrincipal = Depends(get_current_user)
+):
+    """Queues a video for background analysis and returns a job ID to poll or stream."""
+    require_artifacts(VIDEO_ARTIFACTS)
+
+    os.makedirs(ANALYSIS_JOBS_DIR, exist_ok=True)
+    video_path = await save_upload_to_disk(file, suffix=".mp4", dir=ANALYSIS_JOBS_DIR)
 
+    try:
+        return analysis_jobs.submit(current_user.id, video_path)
+    except queue.Full:
+        os.unlink(video_path)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many videos are waiting for analysis. Please retry shortly.",
+            headers={"Retry-After": "30"},
+        )
+
+@app.get("/analyze-session/jobs/{job_id}")
+async def get_analysis_job(job_id: str, current_user: auth.UserPrincipal = Depends(get_current_user)):
+    job = analysis_jobs.snapshot(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/analyze-session/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: str, current_user: auth.UserPrincipal = Depends(get_current_user)):
+    """Server-Sent Events stream of job progress; ends after the final `done`/`failed` event."""
+    if analysis_jobs.snapshot(job_id, current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_version = None
+        while True:
+            job = analysis_jobs.snapshot(job_id, current_user.id)
+            if job is None:
+                break
+            if job["version"] != last_version:
+                last_version = job["version"]
+                event = job["status"] if job["status"] in TERMINAL_STATES else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+            if job["status"] in TERMINAL_STATES:
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# --- Feedback Sentiment ---
+# Notes are saved immediately; sentiment is analyzed in batches (one Gemini call per batch,
+# lexicon fallback when Gemini is unavailable) by a background worker.
+feedback_analyzer = FeedbackAnalyzer(
+    analyze_feedback_batch,
+    batch_size=int(os.getenv("FEEDBACK_BATCH_SIZE", "20")),
+    max_wait=float(os.getenv("FEEDBACK_BATCH_WAIT_SECONDS", "2"))
+)
+feedback_analyzer.start()
 
 @app.post("/submit-feedback/")
 async def submit_feedback(
         feedback_req: FeedbackRequest,
-        current_user: User = Depends(get_current_user),
+        current_user: auth.UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     try:
-        analysis = analyze_feedback_text(feedback_req.feedback)
-        
         session = db.query(YogaSession).filter(YogaSession.id == feedback_req.sessionId, YogaSession.user_id == current_user.id).first()
         if not session:
              raise HTTPException(status_code=404, detail="Session not found")
         
+        # Sentiment is filled in later by the background analyzer.
         session.feedback_notes = feedback_req.feedback
-        session.feedback_analysis = analysis
+        session.feedback_analysis = None
         db.commit()
+        user_context_cache.invalidate(current_user.id)
+        feedback_analyzer.enqueue(session.id)
         
         return {"message": "Feedback submitted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing feedback: {e}")
 
@@ -451,7 +762,7 @@ async def submit_feedback(
 @app.post("/add-journal-entry/")
 async def add_journal_entry(
         entry_req: JournalEntryRequest,
-        current_user: User = Depends(get_current_user),
+        current_user: auth.UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     try:
@@ -463,140 +774,229 @@ async def add_journal_entry(
         db.add(new_entry)
         db.commit()
         db.refresh(new_entry)
+        user_context_cache.invalidate(current_user.id)
         return {"message": "Notes added successfully", "id": new_entry.id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding journal entry: {e}")
 
 
-@app.get("/get-sessions/")
-async def get_sessions(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    sessions = db.query(YogaSession).filter(YogaSession.user_id == current_user.id).order_by(YogaSession.date.desc()).all()
-    return sessions
-
+def history_page(db, model, out_model, date_column, user_id, response, limit, cursor, fields, descending=True):
+    """One page of a user's rows, newest first, optionally projected to `fields` (id and date always included)."""
+    columns = parse_fields(fields, out_model, always=("id", date_column.key))
+    query = db.query(*[getattr(model, c) for c in columns]) if columns else db.query(model)
+    rows, next_cursor = paginate(
+        query.filter(model.user_id == user_id), model, date_column, descending=descending, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+# History endpoints return one page (`limit`, default HISTORY_DEFAULT_PAGE_SIZE, capped at
+# HISTORY_MAX_PAGE_SIZE) and set X-Next-Cursor when there is more; pass it back as `cursor`.
+@app.get("/get-sessions/", response_model=list[SessionOut], response_model_exclude_unset=True)
+async def get_sessions(
+        response: Response,
+        limit: int | None = Query(None, ge=1),
+        cursor: str | None = None,
+        fields: str | None = None,
+        current_user: auth.UserPrincipal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    return history_page(db, YogaSession, SessionOut, YogaSession.date, current_user.id, response, limit, cursor, fields)
 
-@app.get("/get-journal-entries/")
-async def get_journal_entries(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    entries = db.query(JournalEntry).filter(JournalEntry.user_id == current_user.id).order_by(JournalEntry.date.desc()).all()
-    return entries
 
-@app.get("/get-coach-history/")
-async def get_coach_history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.get("/get-journal-entries/", response_model=list[JournalEntryOut], response_model_exclude_unset=True)
+async def get_journal_entries(
+        response: Response,
+        limit: int | None = Query(None, ge=1),
+        cursor: str | None = None,
+        fields: str | None = None,
+        current_user: auth.UserPrincipal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    return history_page(db, JournalEntry, JournalEntryOut, JournalEntry.date, current_user.id, response, limit, cursor, fields)
+
+@app.get("/get-coach-history/", response_model=list[ChatHistoryOut], response_model_exclude_unset=True)
+async def get_coach_history(
+        response: Response,
+        limit: int | None = Query(None, ge=1),
+        cursor: str | None = None,
+        fields: str | None = None,
+        current_user: auth.UserPrincipal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
     # Assuming coach history is stored in ChatHistory table now
-    history = db.query(ChatHistory).filter(ChatHistory.user_id == current_user.id).order_by(ChatHistory.created_date.desc()).all()
-    return history
+    return history_page(db, ChatHistory, ChatHistoryOut, ChatHistory.created_date, current_user.id, response, limit, cursor, fields)
 
 @app.post("/ask-gemini/")
-async def ask_gemini(data: QueryModel, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def ask_gemini(data: QueryModel, current_user: auth.UserPrincipal = Depends(get_current_user)):
     user_query = data.query
     if not user_query:
         raise HTTPException(status_code=422, detail="Query cannot be empty")
 
     try:
-        # Pass user_id (int) to the crew function
-        result = crew(user_query, current_user.id)
-
-        # result is a CrewOutput object, convert to string for DB
-        bot_response_text = str(result)
-
-        # Save to ChatHistory
-        new_chat = ChatHistory(
-            user_id=current_user.id,
-            user_query=user_query,
-            bot_response=bot_response_text,
-            created_date=datetime.datetime.utcnow()
+        loop = asyncio.get_running_loop()
+        bot_response_text = await loop.run_in_executor(
+            coach_executor, answer_coach_query, data, current_user.id
         )
-        db.add(new_chat)
-        db.commit()
-
         return {"response": bot_response_text}
 
     except Exception as e:
         print(f"Error in ask-gemini endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-@app.get("/get-calendar/")
-async def get_calendar(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.post("/ask-gemini/stream")
+async def ask_gemini_stream(data: QueryModel, current_user: auth.UserPrincipal = Depends(get_current_user)):
+    """
+    Server-Sent Events version of /ask-gemini/: `chunk` events carry partial text as the model
+    streams it, then a single `done` event carries the full response (or `failed`).
+    Partial chunks may include the agent's intermediate reasoning; `done` is authoritative.
+    """
+    user_query = data.query
+    if not user_query:
+        raise HTTPException(status_code=422, detail="Query cannot be empty")
+
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+
+    def on_chunk(text):
+        loop.call_soon_threadsafe(chunks.put_nowait, text)
+
+    answer = loop.run_in_executor(coach_executor, answer_coach_query, data, current_user.id, on_chunk)
+    # Chunks and the completion are both delivered through the loop, so the sentinel comes last.
+    answer.add_done_callback(lambda _: chunks.put_nowait(None))
+
+    async def event_stream():
+        while (chunk := await chunks.get()) is not None:
+            yield f"event: chunk\ndata: {json.dumps({'text': chunk})}\n\n"
+        try:
+            bot_response_text = answer.result()
+        except Exception as e:
+            print(f"Error in ask-gemini stream: {e}")
+            yield f"event: failed\ndata: {json.dumps({'error': 'Internal Server Error'})}\n\n"
+            return
+        yield f"event: done\ndata: {json.dumps({'response': bot_response_text})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/get-calendar/", response_model=CalendarOut)
+async def get_calendar(
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        current_user: auth.UserPrincipal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Sessions and plans, optionally restricted to the [start, end) window the calendar is showing."""
     try:
-        sessions = db.query(YogaSession).filter(YogaSession.user_id == current_user.id).all()
-        plans = db.query(CalendarPlan).filter(CalendarPlan.user_id == current_user.id).all()
-        return {"sessions": sessions, "plans": plans}
+        sessions = db.query(YogaSession).filter(YogaSession.user_id == current_user.id)
+        plans = db.query(CalendarPlan).filter(CalendarPlan.user_id == current_user.id)
+        if start is not None:
+            sessions = sessions.filter(YogaSession.date >= start)
+            plans = plans.filter(CalendarPlan.planned_date >= start)
+        if end is not None:
+            sessions = sessions.filter(YogaSession.date < end)
+            plans = plans.filter(CalendarPlan.planned_date < end)
+        return {
+            "sessions": sessions.order_by(YogaSession.date.asc(), YogaSession.id.asc()).all(),
+            "plans": plans.order_by(CalendarPlan.planned_date.asc(), CalendarPlan.id.asc()).all()
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/approve-plan/")
-async def approve_plan(req: ApprovePlanRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def approve_plan(req: ApprovePlanRequest, current_user: auth.UserPrincipal = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        for item in req.plans:
-            new_plan = CalendarPlan(
-                user_id=current_user.id,
-                title=item.title,
-                description=item.description,
-                planned_date=datetime.datetime.fromisoformat(item.planned_date.replace('Z', '')),
-                status="planned"
-            )
-            db.add(new_plan)
+        plan_ids = insert_rows(db, CalendarPlan, [
+            {
+                "user_id": current_user.id,
+                "title": item.title,
+                "description": item.description,
+                "planned_date": datetime.datetime.fromisoformat(item.planned_date.replace('Z', '')),
+                "status": "planned"
+            } for item in req.plans
+        ])
         db.commit()
-        return {"message": "Plans added to calendar successfully"}
+        user_context_cache.invalidate(current_user.id)
+        return {"message": "Plans added to calendar successfully", "ids": plan_ids}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/get-streak/")
-async def get_streak(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_streak(current_user: auth.UserPrincipal = Depends(get_current_user), db: Session = Depends(get_db)):
+    # One primary-key read of the incrementally maintained aggregates (see progress_stats.py).
     try:
-        session_dates = db.query(YogaSession.date).filter(YogaSession.user_id == current_user.id).order_by(YogaSession.date.desc()).all()
-        if not session_dates:
-            return {"streak": 0}
-        unique_dates = sorted(list(set([d[0].date() for d in session_dates])), reverse=True)
-        today = datetime.date.today()
-        yesterday = today - datetime.timedelta(days=1)
-        if unique_dates[0] not in [today, yesterday]:
-            return {"streak": 0}
-        streak = 0
-        current_check = unique_dates[0]
-        for date in unique_dates:
-            if date == current_check:
-                streak += 1
-                current_check -= datetime.timedelta(days=1)
-            else:
-                break
-        return {"streak": streak}
+        progress = db.get(database.UserProgress, current_user.id)
+        return {
+            "streak": progress_stats.current_streak(progress),
+            "longest_streak": progress.longest_streak if progress else 0
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/get-progress/")
+async def get_progress(
+        days: int = Query(30, ge=1, le=366),
+        current_user: auth.UserPrincipal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Lifetime totals, streaks and per-day/per-pose aggregates for the last `days` days."""
+    try:
+        return progress_stats.progress_summary(db, current_user.id, days=days)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/get-exercises/")
-async def get_exercises():
+async def get_exercises(request: Request):
     try:
-        import json
-        with open('pose_templates.json', 'r') as f:
-            templates = json.load(f)
-        
-        # Helper to find matching image
-        images = os.listdir('reference_images') if os.path.exists('reference_images') else []
-        
-        exercises = []
-        for key, data in templates.items():
-            if key == "alanasana":
-                continue
-            
-            # Match key to image filename
-            # e.g. adho_mukha_svanasana -> Adho Mukha Svanasana.jpeg/jpg
-            display_name = key.replace("_", " ").title()
-            thumbnail = ""
-            for img in images:
-                if img.lower().startswith(display_name.lower()):
-                    thumbnail = f"images/{img}"
-                    break
-            
-            exercises.append({
-                "id": key,
-                "name": display_name,
-                "description": data.get("description", ""),
-                "thumbnail": thumbnail,
-                "category": "Balance" if "vrksasana" in key or "chandrasana" in key else "Strength" if "virabhadrasana" in key or "phalakasana" in key else "Flexibility",
-                "angles": data.get("angles", {})
-            })
-        return exercises
+        body, etag = pose_catalog.exercises()
+        # Clients that already hold this catalog version get an empty 304.
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
     except Exception as e:
         print(f"Error fetching exercises: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving, whether or not models have finished loading."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once the vision/classifier models are loaded, 503 otherwise. Includes per-artifact load times."""
+    ready = artifacts.is_ready(MODEL_ARTIFACTS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "artifacts": artifacts.status()}
+    )
+
+
+@app.get("/metrics/inference")
+async def inference_metrics():
+    """Queue depth, wait time and throughput of the CV/ML inference pool."""
+    return inference_pool.metrics()
+
+@app.get("/metrics/password-hashing")
+async def password_hashing_metrics():
+    """Queue depth and wait time of the password hashing pool."""
+    return password_pool.metrics()
+
+@app.get("/metrics/feedback")
+async def feedback_metrics():
+    """Backlog and batch counts of the background feedback analyzer."""
+    return feedback_analyzer.metrics()
+
+
+@app.get("/metrics/caches")
+async def cache_metrics():
+    """Hit/miss counters of the in-process caches."""
+    return {
+        "user_context": user_context_cache.stats(),
+        "coach_responses": response_cache.stats(),
+        "auth_tokens": auth.token_cache.stats()
+    }
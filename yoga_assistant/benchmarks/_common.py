@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Benchmarks live one level below the app modules; make them importable.
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def make_synthetic_clip(path, seconds=10, fps=30, size=(640, 480)):
+    """Writes a synthetic MP4 clip (moving shapes on a noisy background) and returns its path."""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 60, size=(height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        frame = background.copy()
+        cx = int((width / 2) + (width / 4) * np.sin(i / fps))
+        cv2.circle(frame, (cx, height // 3), 30, (200, 180, 160), -1)
+        cv2.rectangle(frame, (cx - 20, height // 3 + 30), (cx + 20, height - 60), (180, 160, 140), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def timed(fn, *args, **kwargs):
+    """Returns (result, elapsed_seconds) for a single call."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
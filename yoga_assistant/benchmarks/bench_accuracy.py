@@ -0,0 +1,53 @@
+"""
+Equivalence check and timing of batch pose scoring against per-frame `calculate_pose_accuracy`.
+
+    python benchmarks/bench_accuracy.py --frames 5000
+
+Exits non-zero if any row of `calculate_pose_accuracy_batch` (accuracy, summary feedback or, with
+details requested, the per-angle messages) differs from the single-frame result.
+"""
+import argparse
+import sys
+
+from _common import timed
+
+import numpy as np
+
+from accuracy_calculator import calculate_pose_accuracy, calculate_pose_accuracy_batch
+from pose_catalog import catalog
+
+ANGLE_NAMES = [
+    'angle_right_elbow', 'angle_left_elbow', 'angle_right_shoulder', 'angle_left_shoulder',
+    'angle_right_hip', 'angle_left_hip', 'angle_right_knee', 'angle_left_knee',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    poses = [key.replace("_", " ").title() for key in catalog.templates()] + ["Unknown Pose"]
+    angles = rng.uniform(0, 180, size=(args.frames, len(ANGLE_NAMES)))
+    angles[rng.uniform(size=angles.shape) < 0.2] = np.nan
+    angles[::97] = np.nan
+    pose_names = [poses[i % len(poses)] for i in range(args.frames)]
+
+    rows = [dict(zip(ANGLE_NAMES, row.tolist())) for row in angles]
+    single, single_time = timed(lambda: [calculate_pose_accuracy(r, p) for r, p in zip(rows, pose_names)])
+    batch, batch_time = timed(calculate_pose_accuracy_batch, angles, pose_names, ANGLE_NAMES)
+    detailed = calculate_pose_accuracy_batch(angles, pose_names, ANGLE_NAMES, with_details=True)
+
+    for i, expected in enumerate(single):
+        if (expected["accuracy"] != batch["accuracy"][i] or expected["feedback"] != batch["feedback"][i]
+                or expected["details"] != detailed["details"][i]):
+            sys.exit(f"MISMATCH at row {i}: {expected} vs batch")
+
+    print(f"equivalent on {args.frames} frames across {len(poses)} poses")
+    print(f"per-frame: {single_time * 1000:.1f} ms ({args.frames / single_time:,.0f} frames/s)")
+    print(f"batch:     {batch_time * 1000:.1f} ms ({args.frames / batch_time:,.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Adaptive vs. fixed-rate frame sampling on a clip of holds and transitions.
+
+    python benchmarks/bench_adaptive_sampling.py [--holds 6] [--hold-seconds 20] [--fps 30] [--min-rate 1]
+
+Renders a synthetic class: a figure holds a pose (small sway, sensor noise) and moves to the next
+one during short transitions. The stand-in classifier reads the pose from the figure's colour, flickers
+on a few frames and reports "no pose" mid-transition, and its labels go through the same
+PoseSegmenter as the backend. Reports the fraction of frames each sampler analyzed, and how far
+adaptive segment boundaries/durations are from the fixed 4 fps baseline (and from the script).
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from _common import APP_DIR, timed  # noqa: F401
+
+import cv2
+import numpy as np
+
+from video_analyzer import MotionSampler, PoseSegmenter, iter_adaptive_frames, iter_sampled_frames
+
+POSE_COLOURS = [(60, 60, 220), (60, 200, 60), (220, 120, 40), (200, 60, 200), (40, 200, 220), (140, 140, 140)]
+
+
+def make_class_clip(path, holds, hold_seconds, transition_seconds, fps, size=(320, 240)):
+    """Writes the clip and returns the scripted (pose, start_sec, end_sec) holds."""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(30, 70, size=(height, width, 3), dtype=np.uint8)
+    positions = [int(width * (0.25 + 0.5 * (i % 2))) for i in range(holds)]
+    script, t = [], 0.0
+    for i in range(holds):
+        script.append((f"pose{i % len(POSE_COLOURS)}", t, t + hold_seconds))
+        t += hold_seconds + (transition_seconds if i < holds - 1 else 0)
+
+    for frame_no in range(int(round(t * fps))):
+        sec = frame_no / fps
+        i = min(int(sec // (hold_seconds + transition_seconds)), holds - 1)
+        into = sec - i * (hold_seconds + transition_seconds)
+        if into < hold_seconds or i == holds - 1:
+            x, colour = positions[i] + int(round(np.sin(sec * 2))), POSE_COLOURS[i % len(POSE_COLOURS)]
+        else:
+            a = (into - hold_seconds) / transition_seconds
+            x = int(positions[i] + a * (positions[i + 1] - positions[i]))
+            c0, c1 = np.array(POSE_COLOURS[i % len(POSE_COLOURS)]), np.array(POSE_COLOURS[(i + 1) % len(POSE_COLOURS)])
+            colour = tuple(int(v) for v in (1 - a) * c0 + a * c1)
+        frame = background.copy()
+        cv2.circle(frame, (x, height // 4), 18, colour, -1)
+        cv2.rectangle(frame, (x - 14, height // 4 + 18), (x + 14, height - 30), colour, -1)
+        noise = rng.integers(-4, 5, size=frame.shape, dtype=np.int16)
+        writer.write(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    writer.release()
+    return script
+
+
+def classify(frame_idx, frame):
+    """Pose from the figure colour; None when it matches no pose (mid-transition). Flickers ~5% of frames."""
+    height, width = frame.shape[:2]
+    torso = frame[height // 2 - 10:height // 2 + 10]
+    mask = torso.astype(np.int16).sum(axis=2) > 300
+    if not mask.any():
+        return None
+    colour = torso[mask].mean(axis=0)
+    distances = [np.abs(colour - np.array(c)).sum() for c in POSE_COLOURS]
+    best = int(np.argmin(distances))
+    if distances[best] > 60:
+        return None
+    if (frame_idx * 7919) % 100 < 5:
+        return f"pose{(best + 1) % len(POSE_COLOURS)}"
+    return f"pose{best}"
+
+
+def analyze(path, adaptive, args):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    sampler = None
+    if adaptive:
+        sampler = MotionSampler(fps, min_rate=args.min_rate, max_rate=4,
+                                low_motion=args.low_motion, high_motion=args.high_motion)
+        frames, step = iter_adaptive_frames(cap, sampler), sampler.min_interval
+    else:
+        step = max(int(fps / 4), 1)
+        frames = iter_sampled_frames(cap, step)
+    segmenter = PoseSegmenter(fps, frame_step=step, window=5)
+    segments, samples = [], 0
+    for frame_idx, frame in frames:
+        samples += 1
+        segments.extend(segmenter.push(frame_idx, classify(frame_idx, frame), 80.0))
+    segments.extend(segmenter.finish(total_frames, sampler.interval if sampler else None))
+    cap.release()
+    return [s for s in segments if s["duration"] >= 5], samples, total_frames
+
+
+def compare(label, reference, segments):
+    if [s[0] for s in reference] != [s["pose"] for s in segments]:
+        raise SystemExit(f"MISMATCH: {label} found {[s['pose'] for s in segments]}, expected {[s[0] for s in reference]}")
+    starts = [abs(s["start_sec"] - r[1]) for r, s in zip(reference, segments)]
+    ends = [abs(s["end_sec"] - r[2]) for r, s in zip(reference, segments)]
+    durations = [abs(s["duration"] - (r[2] - r[1])) for r, s in zip(reference, segments)]
+    print(f"  vs {label:8s} boundary error mean {np.mean(starts + ends):5.2f}s max {max(starts + ends):5.2f}s | "
+          f"duration error mean {np.mean(durations):5.2f}s max {max(durations):5.2f}s")
+    return max(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holds", type=int, default=6)
+    parser.add_argument("--hold-seconds", type=float, default=20)
+    parser.add_argument("--transition-seconds", type=float, default=3)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--min-rate", type=float, default=1.0)
+    parser.add_argument("--low-motion", type=float, default=2.0)
+    parser.add_argument("--high-motion", type=float, default=6.0)
+    parser.add_argument("--tolerance", type=float, default=1.0, help="max duration drift vs. the baseline (s)")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "class.mp4")
+        script = make_class_clip(path, args.holds, args.hold_seconds, args.transition_seconds, args.fps)
+        runs = {}
+        for name, adaptive in (("fixed", False), ("adaptive", True)):
+            (segments, samples, total), seconds = timed(analyze, path, adaptive, args)
+            runs[name] = segments
+            print(f"{name:8s} analyzed {samples:5d}/{total} frames ({samples / total:6.1%}) in {seconds:5.2f}s, "
+                  f"{len(segments)} holds")
+            compare("script", script, segments)
+
+        baseline = [(s["pose"], s["start_sec"], s["end_sec"]) for s in runs["fixed"]]
+        drift = compare("fixed", baseline, runs["adaptive"])
+        if drift > args.tolerance:
+            raise SystemExit(f"MISMATCH: adaptive durations drift {drift:.2f}s from the fixed-rate baseline")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Equivalence check and timing of the vectorized joint-angle engine against the scalar path.
+
+    python benchmarks/bench_angles.py --frames 5000
+
+Exits non-zero if `compute_angles` / `features_from_landmark_array` disagree with the original
+per-angle `calculate_angle` loop (including NaN placement for low-visibility joints).
+"""
+import argparse
+import sys
+
+from _common import timed
+
+import numpy as np
+
+from pose_features import (
+    ANGLE_DEFS, FEATURE_NAMES, IDX, NUM_LANDMARKS,
+    calculate_angle, compute_angles, features_from_landmark_array,
+)
+
+
+def scalar_features(landmark_array, visibility_threshold=0.5):
+    """The original dict-building loop, kept here as the reference implementation."""
+    features = {}
+    for i, (x, y, z, v) in enumerate(landmark_array):
+        features[f'landmark_{i}_x'] = x
+        features[f'landmark_{i}_y'] = y
+        features[f'landmark_{i}_z'] = z
+        features[f'landmark_{i}_v'] = v
+    joints = {
+        name: list(landmark_array[idx, :3]) if landmark_array[idx, 3] > visibility_threshold else None
+        for name, idx in IDX.items()
+    }
+    for angle_name, (a, b, c) in ANGLE_DEFS.items():
+        if joints[a] and joints[b] and joints[c]:
+            features[angle_name] = calculate_angle(joints[a], joints[b], joints[c])
+        else:
+            features[angle_name] = np.nan
+    return features
+
+
+def random_landmarks(n, rng):
+    batch = rng.uniform(-1.0, 1.0, size=(n, NUM_LANDMARKS, 4))
+    batch[..., 3] = rng.uniform(0.4, 1.0, size=(n, NUM_LANDMARKS))
+    # Exercise degenerate geometry too: coincident joints give zero-length vectors.
+    batch[::50, IDX['right_elbow'], :3] = batch[::50, IDX['right_shoulder'], :3]
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5000)
+    args = parser.parse_args()
+
+    batch = random_landmarks(args.frames, np.random.default_rng(42))
+
+    reference, scalar_time = timed(lambda: [scalar_features(frame) for frame in batch])
+    angles, vector_time = timed(compute_angles, batch)
+
+    expected = np.array([[row[name] for name in FEATURE_NAMES] for row in reference])
+    actual = np.array([list(features_from_landmark_array(frame).values()) for frame in batch])
+    if list(features_from_landmark_array(batch[0])) != FEATURE_NAMES:
+        sys.exit("MISMATCH: feature column order differs from the scalar path")
+    if not np.allclose(actual, expected, equal_nan=True, atol=1e-9):
+        sys.exit("MISMATCH: feature dicts differ from the scalar path")
+    if not np.allclose(angles, expected[:, -len(ANGLE_DEFS):], equal_nan=True, atol=1e-9):
+        sys.exit("MISMATCH: vectorized angles differ from the scalar path")
+
+    nan_share = np.isnan(angles).mean() * 100
+    print(f"equivalent on {args.frames} frames ({nan_share:.1f}% masked angles)")
+    print(f"scalar:     {scalar_time * 1000:.1f} ms ({args.frames / scalar_time:,.0f} frames/s)")
+    print(f"vectorized: {vector_time * 1000:.1f} ms ({args.frames / vector_time:,.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
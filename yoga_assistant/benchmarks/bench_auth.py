@@ -0,0 +1,77 @@
+"""
+Cost of the auth dependency per request: JWT verify + users query vs. the verified-token cache.
+
+    python benchmarks/bench_auth.py [--calls 20000] [--users 100]
+
+Creates --users users in a temporary SQLite database, issues one token each and resolves tokens
+round-robin through auth.principal_for_token with the same user loader the backend uses, first with
+the cache disabled (every call decodes the JWT and queries the users table) and then enabled.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from _common import APP_DIR  # noqa: F401
+
+from sqlalchemy.orm import sessionmaker
+
+import auth
+import database
+from database import Base, User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = Session()
+        users = [User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="") for i in range(args.users)]
+        db.add_all(users)
+        db.commit()
+        tokens = [auth.create_access_token({"sub": u.username, "id": u.id}) for u in users]
+        db.close()
+
+        def load_user(user_id):
+            # Mirrors backend.load_user_principal against the benchmark database.
+            session = Session()
+            try:
+                user = session.query(User).filter(User.id == user_id).first()
+                return user and auth.UserPrincipal(id=user.id, username=user.username, email=user.email)
+            finally:
+                session.close()
+
+        results = {}
+        for label, max_entries in (("uncached", 0), ("cached", 10000)):
+            auth.token_cache = auth.VerifiedTokenCache(max_entries=max_entries, ttl_seconds=300)
+            latencies = []
+            for i in range(args.calls):
+                token = tokens[i % len(tokens)]
+                started = time.perf_counter()
+                principal = auth.principal_for_token(token, load_user)
+                latencies.append((time.perf_counter() - started) * 1e6)
+                if principal.username != f"user{i % len(tokens)}":
+                    raise SystemExit("MISMATCH: wrong principal for token")
+            results[label] = latencies
+            print(f"{label:9s} mean {statistics.mean(latencies):8.1f}us  p50 {statistics.median(latencies):8.1f}us  "
+                  f"p99 {statistics.quantiles(latencies, n=100)[98]:8.1f}us  ({auth.token_cache.stats()['hit_rate']:.1%} hits)")
+
+        speedup = statistics.mean(results["uncached"]) / statistics.mean(results["cached"])
+        print(f"speedup: {speedup:.1f}x")
+        engine.dispose()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
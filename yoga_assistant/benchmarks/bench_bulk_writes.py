@@ -0,0 +1,93 @@
+"""
+Batched writes: ORM unit of work (add + commit + refresh) vs. bulk_writes.insert_rows.
+
+    python benchmarks/bench_bulk_writes.py [--requests 2000] [--sizes 1,5,20,200]
+
+Each "request" writes a batch of --sizes rows in one transaction, like /analyze-session/ (a few
+poses), /approve-plan/ (a week of plans) or a large import. Both paths produce the same rows and
+return the new ids; the ORM path refreshes each object to read its id, as the endpoints used to.
+Runs against a temporary SQLite database with the default engine profile.
+"""
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+
+from _common import APP_DIR, timed  # noqa: F401
+
+from sqlalchemy.orm import sessionmaker
+
+import database
+from database import Base, YogaSession
+from bulk_writes import insert_rows
+
+
+def make_rows(n, offset):
+    now = datetime.datetime.utcnow()
+    return [{
+        "user_id": 1 + (offset + i) % 50,
+        "pose_name": "Tree",
+        "confidence_score": 0.0,
+        "accuracy_score": 80 + i % 20,
+        "feedback_text": "Held for 30 seconds. Great form!",
+        "duration": 30,
+        "date": now,
+    } for i in range(n)]
+
+
+def write_orm(Session, batches):
+    ids = []
+    for rows in batches:
+        db = Session()
+        objects = [YogaSession(**row) for row in rows]
+        db.add_all(objects)
+        db.commit()
+        for obj in objects:
+            db.refresh(obj)
+            ids.append(obj.id)
+        db.close()
+    return ids
+
+
+def write_bulk(Session, batches):
+    ids = []
+    for rows in batches:
+        db = Session()
+        ids.extend(insert_rows(db, YogaSession, rows))
+        db.commit()
+        db.close()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="batches per measurement (scaled down for big sizes)")
+    parser.add_argument("--sizes", default="1,5,20,200")
+    parser.add_argument("--profile", default="wal", help="SQLite engine profile (see database.SQLITE_PROFILES)")
+    args = parser.parse_args()
+
+    print(f"{'rows/batch':>10s} {'batches':>8s} {'orm rows/s':>11s} {'bulk rows/s':>12s} {'speedup':>8s}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        batches_count = max(20, args.requests // max(1, size // 5))
+        results = {}
+        for name, write in (("orm", write_orm), ("bulk", write_bulk)):
+            tmp_dir = tempfile.mkdtemp()
+            try:
+                engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", args.profile)
+                Base.metadata.create_all(bind=engine)
+                Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                batches = [make_rows(size, b * size) for b in range(batches_count)]
+                ids, seconds = timed(write, Session, batches)
+                if ids != list(range(1, size * batches_count + 1)):
+                    raise SystemExit(f"MISMATCH: {name} returned unexpected ids")
+                results[name] = size * batches_count / seconds
+                engine.dispose()
+            finally:
+                shutil.rmtree(tmp_dir)
+        print(f"{size:10d} {batches_count:8d} {results['orm']:11.0f} {results['bulk']:12.0f} "
+              f"{results['bulk'] / results['orm']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
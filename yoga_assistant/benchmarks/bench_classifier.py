@@ -0,0 +1,96 @@
+"""
+Parity, latency and memory of the Keras and NumPy pose classifier backends.
+
+    python benchmarks/bench_classifier.py
+
+Exits non-zero if the NumPy backend disagrees with Keras on any predicted class or by more than
+1e-4 on any probability. Memory is the peak RSS of a fresh process that imports and loads one
+backend and classifies one batch, so import costs (TensorFlow vs NumPy) are included.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+
+from _common import APP_DIR, timed
+
+import numpy as np
+
+MODEL_DIR = os.path.join(APP_DIR, "YOGA_NOTEBOOK")
+NPZ_PATH = os.path.join(MODEL_DIR, "pose_classifier.npz")
+
+
+def load_backend(name):
+    from pose_classifier import KerasPoseClassifier, NumpyPoseClassifier
+    if name == "keras":
+        return KerasPoseClassifier.load(MODEL_DIR)
+    return NumpyPoseClassifier.load(NPZ_PATH)
+
+
+def random_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.hstack([rng.uniform(-1, 1, size=(n, 132)), rng.uniform(0, 180, size=(n, 8))])
+    features[rng.uniform(size=features.shape) < 0.1] = np.nan
+    return features
+
+
+def _peak_rss_self_mb():
+    # VmHWM resets on exec; ru_maxrss on Linux can carry over the parent's peak.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_mb(backend):
+    """Runs this script in a child process that loads only `backend` and reports its peak RSS."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--rss-child", backend], capture_output=True, text=True, check=True
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--rss-child", choices=["keras", "numpy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.rss_child:
+        load_backend(args.rss_child).predict(random_features(256))
+        print(_peak_rss_self_mb())
+        return
+
+    # Measured first, from a parent that has not imported TensorFlow yet.
+    rss = {name: peak_rss_mb(name) for name in ("keras", "numpy")}
+
+    (keras, load_keras), (numpy_backend, load_numpy) = timed(load_backend, "keras"), timed(load_backend, "numpy")
+    features = random_features(args.rows)
+
+    expected, actual = keras.predict_proba(features), numpy_backend.predict_proba(features)
+    agreement = (expected.argmax(axis=1) == actual.argmax(axis=1)).mean()
+    max_diff = np.abs(expected - actual).max()
+    print(f"parity on {args.rows} rows: class agreement {agreement * 100:.2f}%, max |dp| {max_diff:.2e}")
+    if agreement < 1.0 or max_diff > 1e-4:
+        sys.exit("MISMATCH: NumPy backend diverges from Keras")
+
+    print(f"load time: keras {load_keras:.2f}s | numpy {load_numpy * 1000:.1f}ms")
+    for batch in (1, 32, 256):
+        rows = features[:batch]
+        for backend in (keras, numpy_backend):
+            backend.predict(rows)  # warm-up
+            _, elapsed = timed(lambda: [backend.predict(rows) for _ in range(args.repeat)])
+            print(f"batch {batch:>3} | {backend.name:>5}: {elapsed / args.repeat * 1000:.3f} ms/call")
+
+    for name, mb in rss.items():
+        print(f"peak RSS ({name}, fresh process): {mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
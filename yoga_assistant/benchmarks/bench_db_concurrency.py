@@ -0,0 +1,127 @@
+"""
+Concurrent writers and readers on SQLite with the "default" and "wal" engine profiles.
+
+    python benchmarks/bench_db_concurrency.py [--writers 4] [--readers 8] [--seconds 10]
+
+Writer threads commit one YogaSession at a time (as the video analysis path does); reader threads
+repeatedly load a user's 50 most recent sessions (as /get-sessions/?limit=50 does). Each profile
+runs against a fresh database seeded with --seed-rows sessions. Reports throughput, p50/p95
+latency and how many operations failed with "database is locked".
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from _common import APP_DIR  # noqa: F401  (puts the app modules on sys.path)
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import database
+from database import Base, User, YogaSession
+
+
+def seed(engine, users, rows):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add_all([User(username=f"user{u}", email=f"user{u}@example.com", hashed_password="") for u in range(users)])
+    db.commit()
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    db.bulk_insert_mappings(YogaSession, [
+        {"user_id": rng.randint(1, users), "pose_name": "Tree", "confidence_score": 0.9,
+         "accuracy_score": rng.randint(40, 100), "duration": 30, "date": now - datetime.timedelta(minutes=i)}
+        for i in range(rows)
+    ])
+    db.commit()
+    db.close()
+
+
+def worker(kind, Session, users, stop, stats, seed_value):
+    rng = random.Random(seed_value)
+    latencies, locked = [], 0
+    while not stop.is_set():
+        db = Session()
+        started = time.perf_counter()
+        try:
+            user_id = rng.randint(1, users)
+            if kind == "write":
+                db.add(YogaSession(user_id=user_id, pose_name="Tree", confidence_score=0.9,
+                                   accuracy_score=rng.randint(40, 100), duration=30, date=datetime.datetime.utcnow()))
+                db.commit()
+            else:
+                db.query(YogaSession).filter(YogaSession.user_id == user_id) \
+                    .order_by(YogaSession.date.desc(), YogaSession.id.desc()).limit(50).all()
+            latencies.append((time.perf_counter() - started) * 1000)
+        except OperationalError as e:
+            db.rollback()
+            if "locked" not in str(e):
+                raise
+            locked += 1
+        finally:
+            db.close()
+    stats.append((kind, latencies, locked))
+
+
+def run_profile(profile, args):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", sqlite_profile=profile)
+        seed(engine, args.users, args.seed_rows)
+        Session = sessionmaker(bind=engine)
+
+        stop, stats = threading.Event(), []
+        threads = [threading.Thread(target=worker, args=("write", Session, args.users, stop, stats, i))
+                   for i in range(args.writers)]
+        threads += [threading.Thread(target=worker, args=("read", Session, args.users, stop, stats, 100 + i))
+                    for i in range(args.readers)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    report = {}
+    for kind in ("write", "read"):
+        latencies = [ms for k, lat, _ in stats if k == kind for ms in lat]
+        locked = sum(n for k, _, n in stats if k == kind)
+        quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [float("nan")] * 19
+        report[kind] = {
+            "ops_per_s": len(latencies) / args.seconds,
+            "p50_ms": statistics.median(latencies) if latencies else float("nan"),
+            "p95_ms": quantiles[18],
+            "locked": locked,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s per profile\n")
+    print(f"{'profile':8s} {'op':6s} {'ops/s':>9s} {'p50':>9s} {'p95':>9s} {'locked':>7s}")
+    for profile in ("default", "wal"):
+        report = run_profile(profile, args)
+        for kind, r in report.items():
+            print(f"{profile:8s} {kind:6s} {r['ops_per_s']:9.1f} {r['p50_ms']:7.2f}ms {r['p95_ms']:7.2f}ms {r['locked']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Per-user history queries on a seeded SQLite database, before and after the (user_id, date) index migration.
+
+    python benchmarks/bench_db_indexes.py [--rows 2000000] [--users 5000] [--db /tmp/bench_yoga.db]
+
+Seeds `--rows` yoga sessions (plus a quarter as many journal entries and chats, a tenth as many plans)
+spread over `--users` users into a database without the composite indexes, times the queries behind
+/get-sessions/, /get-streak/, /get-journal-entries/, /get-coach-history/, /get-calendar/ and the coach
+SQL tool, then applies the migration and times them again.
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from _common import timed
+
+from sqlalchemy import create_engine, text
+
+BATCH = 50_000
+
+QUERIES = {
+    "sessions (all, newest first)":
+        "SELECT id, pose_name, accuracy_score, date FROM yoga_sessions WHERE user_id = :u ORDER BY date DESC",
+    "sessions (coach, last 10)":
+        "SELECT * FROM yoga_sessions WHERE user_id = :u ORDER BY date DESC LIMIT 10",
+    "streak dates":
+        "SELECT date FROM yoga_sessions WHERE user_id = :u ORDER BY date DESC",
+    "journal (last 5)":
+        "SELECT * FROM journal_entries WHERE user_id = :u ORDER BY date DESC LIMIT 5",
+    "chat (last 5)":
+        "SELECT * FROM chat_history WHERE user_id = :u ORDER BY created_date DESC LIMIT 5",
+    "plans (next 10)":
+        "SELECT * FROM calendar_plans WHERE user_id = :u ORDER BY planned_date ASC LIMIT 10",
+}
+
+
+def seed(engine, rows, users):
+    import database
+    database.Base.metadata.create_all(bind=engine)
+    # Simulate a database created before the migration existed.
+    with engine.begin() as connection:
+        for table in database.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if len(index.columns) > 1:
+                    connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+
+    rng = random.Random(0)
+    start = datetime.datetime(2024, 1, 1)
+    span = 2 * 365 * 24 * 3600
+
+    def when():
+        return (start + datetime.timedelta(seconds=rng.randrange(span))).isoformat(" ")
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.executemany("INSERT INTO users (id, username, email, hashed_password) VALUES (?, ?, ?, '')",
+                        [(u, f"user{u}", f"user{u}@example.com") for u in range(1, users + 1)])
+        tables = [
+            ("INSERT INTO yoga_sessions (user_id, pose_name, confidence_score, accuracy_score, duration, date) "
+             "VALUES (?, 'Tree', 0.9, ?, 30, ?)", rows, lambda: (rng.randint(1, users), rng.randint(40, 100), when())),
+            ("INSERT INTO journal_entries (user_id, entry_text, date) VALUES (?, 'Felt calm today.', ?)",
+             rows // 4, lambda: (rng.randint(1, users), when())),
+            ("INSERT INTO chat_history (user_id, user_query, bot_response, created_date) VALUES (?, 'hi', 'Hello!', ?)",
+             rows // 4, lambda: (rng.randint(1, users), when())),
+            ("INSERT INTO calendar_plans (user_id, title, description, planned_date, status, created_date) "
+             "VALUES (?, 'Morning Flow', '', ?, 'planned', ?)", rows // 10,
+             lambda: (rng.randint(1, users), when(), when())),
+        ]
+        for sql, count, make_row in tables:
+            for offset in range(0, count, BATCH):
+                cur.executemany(sql, [make_row() for _ in range(min(BATCH, count - offset))])
+            raw.commit()
+    finally:
+        raw.close()
+
+
+def run_queries(engine, sample_users):
+    results = {}
+    with engine.connect() as connection:
+        for label, sql in QUERIES.items():
+            statement = text(sql)
+            latencies = []
+            for user_id in sample_users:
+                started = time.perf_counter()
+                connection.execute(statement, {"u": user_id}).fetchall()
+                latencies.append((time.perf_counter() - started) * 1000)
+            results[label] = statistics.median(latencies)
+    return results
+
+
+def query_plan(engine, sql):
+    with engine.connect() as connection:
+        return "; ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"u": 1}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=50, help="users queried per measurement")
+    parser.add_argument("--db", default=None, help="SQLite file to create (default: a temp file)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_yoga.db")
+    if os.path.exists(db_path):
+        sys.exit(f"{db_path} already exists; pass a new path.")
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    from migrations import run_migrations
+
+    _, seconds = timed(seed, engine, args.rows, args.users)
+    print(f"Seeded {args.rows:,} sessions for {args.users:,} users in {seconds:.1f}s ({db_path})")
+    sample_users = random.Random(1).sample(range(1, args.users + 1), min(args.samples, args.users))
+
+    probe = QUERIES["sessions (coach, last 10)"]
+    print(f"Plan before: {query_plan(engine, probe)}")
+    before = run_queries(engine, sample_users)
+    _, seconds = timed(run_migrations, engine)
+    print(f"Migration applied in {seconds:.1f}s")
+    print(f"Plan after:  {query_plan(engine, probe)}")
+    after = run_queries(engine, sample_users)
+
+    print(f"\n{'query (median per user)':32s} {'before':>10s} {'after':>10s} {'speedup':>8s}")
+    for label in QUERIES:
+        print(f"{label:32s} {before[label]:8.2f}ms {after[label]:8.2f}ms {before[label] / after[label]:7.1f}x")
+
+    engine.dispose()
+    if not args.db:
+        os.unlink(db_path)
+        os.rmdir(os.path.dirname(db_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Frames/sec of the /analyze-session/ sampling pipeline, before and after the in-memory frame path.
+
+    python benchmarks/bench_frame_pipeline.py --seconds 30 --fps 30
+
+"before" reproduces the old loop: cap.read() on every frame, then cv2.imwrite -> cv2.imread -> os.unlink
+per sampled frame. "after" grabs skipped frames and hands decoded frames straight to MediaPipe.
+If the MediaPipe task file is missing, detection is skipped and only the decode/I-O overhead is measured.
+"""
+import argparse
+import os
+import tempfile
+
+from _common import APP_DIR, make_synthetic_clip, timed
+
+import cv2
+import mediapipe as mp
+
+from pose_features import extract_features_from_image_robust, extract_features_from_frame
+from video_analyzer import iter_sampled_frames
+
+
+class _NoDetection:
+    """Landmarker stand-in used when the task file is unavailable: isolates pipeline overhead."""
+    class _Result:
+        pose_landmarks = []
+
+    def detect(self, mp_image):
+        return self._Result()
+
+
+def build_landmarker(task_path):
+    if not os.path.exists(task_path):
+        print(f"Task file '{task_path}' not found; measuring decode/I-O overhead only.")
+        return _NoDetection()
+    options = mp.tasks.vision.PoseLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=task_path),
+        running_mode=mp.tasks.vision.RunningMode.IMAGE,
+    )
+    return mp.tasks.vision.PoseLandmarker.create_from_options(options)
+
+
+def run_before(video_path, landmarker, sample_interval):
+    cap = cv2.VideoCapture(video_path)
+    frame_idx, sampled = 0, 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_idx % sample_interval == 0:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as img_tmp:
+                cv2.imwrite(img_tmp.name, frame)
+                img_path = img_tmp.name
+            extract_features_from_image_robust(img_path, landmarker)
+            os.unlink(img_path)
+            sampled += 1
+        frame_idx += 1
+    cap.release()
+    return frame_idx, sampled
+
+
+def run_after(video_path, landmarker, sample_interval):
+    cap = cv2.VideoCapture(video_path)
+    sampled = 0
+    for _, frame in iter_sampled_frames(cap, sample_interval):
+        extract_features_from_frame(frame, landmarker)
+        sampled += 1
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return total, sampled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--task", default=os.path.join(APP_DIR, "YOGA_NOTEBOOK", "pose_landmarker_heavy.task"))
+    args = parser.parse_args()
+
+    landmarker = build_landmarker(args.task)
+    sample_interval = max(int(args.fps / 4), 1)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video_path = make_synthetic_clip(os.path.join(tmp_dir, "synthetic.mp4"), args.seconds, args.fps)
+        for label, runner in (("before", run_before), ("after", run_after)):
+            (total, sampled), elapsed = timed(runner, video_path, landmarker, sample_interval)
+            print(f"{label:>6}: {total} frames ({sampled} sampled) in {elapsed:.2f}s | "
+                  f"{total / elapsed:.1f} source fps | {sampled / elapsed:.1f} sampled fps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Login throughput: password checks inline on the event loop vs. on the dedicated hashing pool.
+
+    python benchmarks/bench_login.py [--logins 200] [--concurrency 32] [--workers 1,2,4] [--rounds 29000]
+
+Fires --logins concurrent verify calls (at most --concurrency in flight) the way /auth/token runs
+them, while a heartbeat task ticks every 10ms to stand in for the other requests on the loop. The
+worst heartbeat delay shows how long the loop was blocked. Stored hashes start at passlib's default
+round count, so with a different --rounds the first pass also exercises rehash-on-login.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from _common import APP_DIR  # noqa: F401
+
+
+async def heartbeat(stop, delays, interval=0.01):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - expected)
+
+
+async def run_logins(check, passwords, hashes, concurrency):
+    """Returns (results, elapsed_seconds, worst_heartbeat_delay_seconds)."""
+    limit = asyncio.Semaphore(concurrency)
+    stop, delays = asyncio.Event(), []
+
+    async def login(i):
+        async with limit:
+            return await check(passwords[i], hashes[i])
+
+    ticker = asyncio.create_task(heartbeat(stop, delays))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(i) for i in range(len(passwords))))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return results, elapsed, max(delays, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--rounds", type=int, default=29000, help="PASSWORD_HASH_ROUNDS for the run")
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+    from passlib.hash import pbkdf2_sha256
+    import auth
+    from bounded_pool import BoundedPool
+
+    users = 20
+    stored = [pbkdf2_sha256.hash(f"secret-{u}") for u in range(users)]
+    passwords = [f"secret-{i % users}" if i % 10 else "wrong" for i in range(args.logins)]
+    hashes = [stored[i % users] for i in range(args.logins)]
+    expected = [i % 10 != 0 for i in range(args.logins)]
+    print(f"{args.logins} logins, {args.concurrency} concurrent, stored rounds {pbkdf2_sha256.default_rounds}, "
+          f"configured rounds {auth.PASSWORD_HASH_ROUNDS}, {os.cpu_count()} CPUs")
+
+    async def inline(password, hashed):
+        return auth.verify_and_update_password(password, hashed)
+
+    modes = [("inline", inline, None)]
+    for workers in (int(w) for w in args.workers.split(",")):
+        pool = BoundedPool(max_workers=workers, max_queue=args.logins, thread_name_prefix="password")
+
+        async def pooled(password, hashed, pool=pool):
+            return await pool.run(auth.verify_and_update_password, password, hashed)
+        modes.append((f"pool x{workers}", pooled, pool))
+
+    print(f"{'mode':>9s} {'logins/s':>9s} {'max loop stall':>15s} {'rehashed':>9s}")
+    for label, check, pool in modes:
+        results, elapsed, stall = asyncio.run(run_logins(check, passwords, hashes, args.concurrency))
+        if [valid for valid, _ in results] != expected:
+            raise SystemExit(f"MISMATCH: {label} accepted/rejected the wrong logins")
+        rehashed = [(passwords[i], new_hash) for i, (_, new_hash) in enumerate(results) if new_hash]
+        if any(auth.pwd_context.needs_update(h) or not auth.pwd_context.verify(p, h) for p, h in rehashed[:users]):
+            raise SystemExit(f"MISMATCH: {label} produced an unusable or outdated rehash")
+        print(f"{label:>9s} {len(results) / elapsed:9.1f} {stall * 1000:13.1f}ms {len(rehashed):9d}")
+        if pool is not None:
+            pool._executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Long-clip analysis: one sequential pass vs. frame ranges labelled in parallel worker processes.
+
+    python benchmarks/bench_parallel_video.py [--workers 2,4] [--holds 12] [--sampling fixed] [--work-ms 20]
+
+Renders the synthetic class from bench_adaptive_sampling (holds of --hold-seconds, short transitions)
+and segments it with video_chunks.ChunkedVideoAnalyzer, exactly as the backend merges chunk results.
+When YOGA_NOTEBOOK/pose_landmarker_heavy.task exists, the workers run the real PoseLabeler (MediaPipe +
+classifier); otherwise a colour-based stand-in labeler spends ~--work-ms of CPU per sample to mimic
+inference. With fixed-rate sampling and the stand-in, the segments must match the sequential pass exactly.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from _common import APP_DIR, timed
+
+import cv2
+
+from bench_adaptive_sampling import classify, make_class_clip
+from video_analyzer import PoseSegmenter, sample_frames
+from video_chunks import ChunkedVideoAnalyzer, PoseLabeler
+
+MODEL_DIR = os.path.join(APP_DIR, "YOGA_NOTEBOOK")
+
+
+def spin(iterations):
+    for _ in range(iterations):
+        pass
+
+
+def iterations_per_ms():
+    started = time.perf_counter()
+    spin(1_000_000)
+    return int(1_000_000 / ((time.perf_counter() - started) * 1000))
+
+
+class StandInLabeler:
+    """Labels frames by figure colour; does a fixed amount of CPU work per sample in place of detection + inference."""
+
+    def __init__(self, work_iterations):
+        self.work_iterations = work_iterations
+
+    def label(self, frames, fps, batch_size):
+        samples = []
+        for frame_idx, frame in frames:
+            spin(self.work_iterations)
+            samples.append((frame_idx, classify(frame_idx, frame), 80.0, "ok"))
+        return samples
+
+
+def sampling_settings(mode):
+    return {"mode": mode, "min_rate": 1.0, "max_rate": 4.0, "low_motion": 2.0, "high_motion": 6.0}
+
+
+def segment_sequential(path, labeler, sampling):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames, sampler, frame_step = sample_frames(cap, fps, sampling)
+    segmenter = PoseSegmenter(fps, frame_step=frame_step, window=5)
+    segments = []
+    for sample in labeler.label(frames, fps, 256):
+        segments.extend(segmenter.push(*sample))
+    segments.extend(segmenter.finish(total_frames, sampler.interval if sampler else frame_step))
+    cap.release()
+    return segments
+
+
+def segment_chunked(path, analyzer, sampling):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    frame_step = max(int(fps / sampling["max_rate"]), 1)
+    segmenter = PoseSegmenter(fps, frame_step=frame_step, window=5)
+    segments, last_step = [], frame_step
+    for _, samples, last_step in analyzer.iter_ranges(path, total_frames, fps, sampling, 256):
+        for sample in samples:
+            segments.extend(segmenter.push(*sample))
+    segments.extend(segmenter.finish(total_frames, last_step))
+    return segments
+
+
+def holds(segments):
+    return [(s["pose"], s["start_frame"], s["end_frame"]) for s in segments if s["duration"] >= 5]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="2,4")
+    parser.add_argument("--holds", type=int, default=12)
+    parser.add_argument("--hold-seconds", type=float, default=30)
+    parser.add_argument("--sampling", default="fixed", choices=["fixed", "adaptive"])
+    parser.add_argument("--work-ms", type=float, default=20.0, help="stand-in labeler CPU per sample")
+    parser.add_argument("--min-chunk-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    real = os.path.exists(os.path.join(MODEL_DIR, "pose_landmarker_heavy.task"))
+    factory, factory_args = (PoseLabeler, (MODEL_DIR, "numpy")) if real else (StandInLabeler, (int(args.work_ms * iterations_per_ms()),))
+    sampling = sampling_settings(args.sampling)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "class.mp4")
+        make_class_clip(path, args.holds, args.hold_seconds, 3, 30)
+        print(f"{'real PoseLabeler' if real else 'stand-in labeler'}, {args.sampling} sampling, "
+              f"{args.holds} holds of {args.hold_seconds:g}s, {os.cpu_count()} CPUs")
+
+        baseline, seconds = timed(segment_sequential, path, factory(*factory_args), sampling)
+        print(f"{'sequential':>12s} {seconds:7.2f}s  {len(holds(baseline))} holds")
+        for workers in (int(w) for w in args.workers.split(",")):
+            analyzer = ChunkedVideoAnalyzer(workers, factory, factory_args, min_chunk_seconds=args.min_chunk_seconds)
+            # Includes spawning the workers and their one-off labeler setup (model loading, when real).
+            segments, chunked_seconds = timed(segment_chunked, path, analyzer, sampling)
+            analyzer.shutdown()
+            drift = max((abs(a[1] - b[1]) + abs(a[2] - b[2]) for a, b in zip(holds(baseline), holds(segments))), default=0)
+            same = holds(segments) == holds(baseline)
+            print(f"{f'{workers} workers':>12s} {chunked_seconds:7.2f}s  {len(holds(segments))} holds  "
+                  f"speedup {seconds / chunked_seconds:4.1f}x  {'identical' if same else f'max boundary drift {drift} frames'}")
+            if [h[0] for h in holds(segments)] != [h[0] for h in holds(baseline)] or (not real and args.sampling == "fixed" and not same):
+                raise SystemExit(f"MISMATCH: {workers}-worker segments differ from the sequential pass")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
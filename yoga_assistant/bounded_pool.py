@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Raised when a bounded pool has no free worker or queue slot."""
+
+
+class BoundedPool:
+    """
+    Bounded thread pool for blocking work kept off the event loop (CV/ML inference, password hashing).
+    At most `max_workers` jobs run and `max_queue` more wait; anything beyond that is rejected
+    immediately so the endpoint can answer 503 instead of stalling the event loop.
+    """
+
+    def __init__(self, max_workers=2, max_queue=8, thread_name_prefix="pool"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._capacity = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _job(self, submitted_at, fn, args, kwargs):
+        started_at = time.perf_counter()
+        wait = started_at - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_total += time.perf_counter() - started_at
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    def _on_done(self, future):
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+        self._capacity.release()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues `fn` on a worker thread and returns its concurrent Future; raises PoolSaturated when full."""
+        if not self._capacity.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolSaturated()
+        with self._lock:
+            self._queued += 1
+        try:
+            future = self._executor.submit(self._job, time.perf_counter(), fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            self._capacity.release()
+            raise
+        # The slot is held until the job really finishes, even if the awaiting request goes away.
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs `fn` on a worker thread and awaits its result; raises PoolSaturated when full."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def call(self, fn, *args, **kwargs):
+        """Blocking `run` for sync handlers (already on FastAPI's threadpool); raises PoolSaturated when full."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def metrics(self):
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / finished * 1000, 2) if finished else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_run_ms": round(self._run_total / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,29 @@
+from sqlalchemy import insert
+
+# --- Bulk Persistence ---
+# Multi-row writes (video results, approved plans) skip the ORM unit of work: no per-object state
+# tracking, no flush ordering, no refresh round trips. Rows are plain dicts of column values.
+
+# Rows per INSERT statement; keeps the bound parameters far below SQLite's 32766-variable limit.
+BULK_INSERT_CHUNK = 500
+
+
+def insert_rows(db, model, rows):
+    """
+    Inserts `rows` into `model`'s table with batched multi-row INSERT ... VALUES statements inside
+    the session's transaction and returns the new primary keys in input order. Uses RETURNING
+    where the dialect supports it for executemany; otherwise falls back to one INSERT per row.
+    Does not commit.
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    if not db.get_bind().dialect.insert_executemany_returning:
+        return [db.execute(insert(table).values(row)).inserted_primary_key[0] for row in rows]
+
+    # SQLAlchemy batches the rows into multi-row VALUES statements ("insertmanyvalues") and matches
+    # the RETURNING rows back to the parameter order, since backends do not guarantee that order.
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    return db.execute(
+        statement, rows, execution_options={"insertmanyvalues_page_size": BULK_INSERT_CHUNK}
+    ).scalars().all()
@@ -0,0 +1,37 @@
+import json
+import os
+import time
+
+from user_context import user_context_cache
+
+# --- Offline Coach ---
+# Drop-in replacement for `yoga_assistant.crew` (COACH_BACKEND=stub): same signature, no CrewAI,
+# no network. It reads the same per-user context as the SQL tool and streams a canned reply word
+# by word, so the chat endpoints and their streaming can be exercised locally and in CI.
+STUB_CHUNK_DELAY = float(os.getenv("COACH_STUB_DELAY_MS", "20")) / 1000
+
+
+def _reply(user_query: str, context):
+    if context is None:
+        return "I couldn't find your history yet, but I'm happy to help you get started!"
+
+    name = context.get("username", "there")
+    sessions = context.get("recent_sessions") or []
+    if sessions:
+        last = sessions[0]
+        history = f"Your last practice was {last['pose']} at {last['accuracy'] or 0:.0f}% accuracy."
+    else:
+        history = "You haven't logged a session yet."
+    return f"Hi {name}! You asked: \"{user_query.strip()}\". {history} Take a slow breath and let's keep going."
+
+
+def stub_crew(user_query: str, user_id: int, on_chunk=None) -> str:
+    context = user_context_cache.get(user_id)
+    text = _reply(user_query, json.loads(context) if context else None)
+    if on_chunk is not None:
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            on_chunk(word if i == len(words) - 1 else word + " ")
+            if STUB_CHUNK_DELAY:
+                time.sleep(STUB_CHUNK_DELAY)
+    return text
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import datetime
@@ -7,16 +7,77 @@ import os
 # --- Database Setup ---
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./yoga_app.db")
 
-# For SQLite, we might need connect_args={"check_same_thread": False}
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# --- SQLite Tuning ---
+# Applied to every new connection through a connect-event listener. "wal" lets readers run alongside
+# a writer and makes commits cheap (synchronous=NORMAL is durable under WAL except on power loss);
+# "default" keeps SQLite's stock rollback-journal behaviour. Individual pragmas can be overridden.
+SQLITE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,        # ms to wait for a lock before "database is locked"
+        "mmap_size": 268435456,      # 256 MiB memory-mapped reads
+        "cache_size": -65536,        # 64 MiB page cache (negative = KiB)
+        "temp_store": "MEMORY",
+    },
+}
+SQLITE_PRAGMA_ENV = {
+    "journal_mode": "SQLITE_JOURNAL_MODE",
+    "synchronous": "SQLITE_SYNCHRONOUS",
+    "busy_timeout": "SQLITE_BUSY_TIMEOUT_MS",
+    "mmap_size": "SQLITE_MMAP_SIZE",
+    "cache_size": "SQLITE_CACHE_SIZE",
+}
+
+
+def sqlite_pragmas(profile=None):
+    profile = profile or os.getenv("SQLITE_PROFILE", "wal")
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}' (expected one of {sorted(SQLITE_PROFILES)}).")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for pragma, env_name in SQLITE_PRAGMA_ENV.items():
+        if os.getenv(env_name):
+            pragmas[pragma] = os.getenv(env_name)
+    return pragmas
+
+
+def create_db_engine(url=SQLALCHEMY_DATABASE_URL, sqlite_profile=None):
+    # For SQLite, we might need connect_args={"check_same_thread": False}
+    if url.startswith("sqlite"):
+        pragmas = sqlite_pragmas(sqlite_profile)
+        db_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(db_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+
+        return db_engine
+
+    # Server databases: size the pool for the API workers plus the background threads
+    # (inference pool, analysis jobs, coach, feedback analyzer) that open their own sessions.
+    return create_engine(
+        url,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=True,
+    )
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # --- Models ---
+# Per-user history is always read as "this user's rows, newest (or soonest) first", so each history
+# table carries a composite (user_id, <date column>) index. In SQLite the integer primary key is part
+# of every index entry, which also covers the (date, id) tie-break order.
 
 class User(Base):
     __tablename__ = "users"
@@ -40,6 +101,8 @@ class YogaSession(Base):
     duration = Column(Integer, default=0) # Duration in seconds
     date = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (Index("ix_yoga_sessions_user_id_date", "user_id", "date"),)
+
 class JournalEntry(Base):
     __tablename__ = "journal_entries"
 
@@ -48,6 +111,8 @@ class JournalEntry(Base):
     entry_text = Column(Text)
     date = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (Index("ix_journal_entries_user_id_date", "user_id", "date"),)
+
 class ChatHistory(Base):
     __tablename__ = "chat_history"
 
@@ -57,6 +122,8 @@ class ChatHistory(Base):
     bot_response = Column(Text)
     created_date = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (Index("ix_chat_history_user_id_created_date", "user_id", "created_date"),)
+
 class CalendarPlan(Base):
     __tablename__ = "calendar_plans"
 
@@ -68,3 +135,48 @@ class CalendarPlan(Base):
     status = Column(String, default="planned") # planned, completed, skipped
     session_id = Column(Integer, ForeignKey("yoga_sessions.id"), nullable=True)
     created_date = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (Index("ix_calendar_plans_user_id_planned_date", "user_id", "planned_date"),)
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True, index=True) # uuid hex
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    status = Column(String, default="queued") # queued, running, done, failed
+    video_path = Column(String)
+    frames_processed = Column(Integer, default=0)
+    total_frames = Column(Integer, default=0)
+    result = Column(Text) # JSON response of the finished analysis
+    error = Column(Text)
+    created_date = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_date = Column(DateTime, default=datetime.datetime.utcnow)
+
+# --- Progress Aggregates ---
+# Maintained incrementally as sessions are saved (see progress_stats.py), so streak and progress
+# reads never scan yoga_sessions. Accuracy is kept as sum/count so averages stay exact.
+
+class UserDailyStat(Base):
+    __tablename__ = "user_daily_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    pose_name = Column(String, primary_key=True)
+    session_count = Column(Integer, default=0)
+    total_duration = Column(Integer, default=0) # seconds
+    accuracy_sum = Column(Float, default=0.0)
+    accuracy_count = Column(Integer, default=0)
+
+class UserProgress(Base):
+    __tablename__ = "user_progress"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_sessions = Column(Integer, default=0)
+    total_duration = Column(Integer, default=0) # seconds
+    accuracy_sum = Column(Float, default=0.0)
+    accuracy_count = Column(Integer, default=0)
+    first_day = Column(Date)
+    last_day = Column(Date)
+    current_streak = Column(Integer, default=0) # consecutive days ending at last_day
+    longest_streak = Column(Integer, default=0)
+    updated_date = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,102 @@
+import json
+import queue
+import threading
+import time
+
+import database
+from database import YogaSession
+
+
+class FeedbackAnalyzer:
+    """
+    Background sentiment analysis for session feedback.
+    `/submit-feedback/` stores the note with `feedback_analysis = NULL` and calls `enqueue()`; a
+    worker thread gathers up to `batch_size` sessions (waiting at most `max_wait` seconds after the
+    first one), analyzes all their notes with one `analyze_batch` call and stores the results as
+    JSON. The table itself is the durable queue: notes still unanalyzed at startup are re-queued.
+    """
+
+    def __init__(self, analyze_batch, batch_size=20, max_wait=2.0):
+        # analyze_batch(list[str]) -> list[dict], one per text
+        self._analyze_batch = analyze_batch
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.analyzed = 0
+        self.failed_batches = 0
+
+    # --- Lifecycle ---
+    def start(self):
+        db = database.SessionLocal()
+        try:
+            pending = db.query(YogaSession.id).filter(
+                YogaSession.feedback_notes.isnot(None), YogaSession.feedback_analysis.is_(None)
+            ).all()
+        finally:
+            db.close()
+        for (session_id,) in pending:
+            self._queue.put(session_id)
+        threading.Thread(target=self._worker, name="feedback-analyzer", daemon=True).start()
+
+    # --- Public API ---
+    def enqueue(self, session_id: int):
+        self._queue.put(session_id)
+
+    def metrics(self):
+        return {
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "analyzed": self.analyzed,
+            "failed_batches": self.failed_batches,
+        }
+
+    # --- Worker ---
+    def _next_batch(self):
+        batch = {self._queue.get()}
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.add(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            session_ids = self._next_batch()
+            try:
+                self._process(session_ids)
+            except Exception as e:
+                self.failed_batches += 1
+                print(f"Feedback analysis batch failed: {e}")
+
+    def _process(self, session_ids):
+        # Read the notes fresh: a note edited while queued is analyzed in its latest form.
+        db = database.SessionLocal()
+        try:
+            rows = db.query(YogaSession.id, YogaSession.feedback_notes).filter(
+                YogaSession.id.in_(session_ids), YogaSession.feedback_notes.isnot(None)
+            ).all()
+        finally:
+            db.close()
+        if not rows:
+            return
+
+        analyses = self._analyze_batch([notes for _, notes in rows])
+
+        db = database.SessionLocal()
+        try:
+            for (session_id, notes), analysis in zip(rows, analyses):
+                # Only store if the note was not changed again in the meantime (it is re-queued then).
+                db.query(YogaSession).filter(
+                    YogaSession.id == session_id, YogaSession.feedback_notes == notes
+                ).update({YogaSession.feedback_analysis: json.dumps(analysis)}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        self.batches += 1
+        self.analyzed += len(rows)
@@ -0,0 +1,80 @@
+import contextlib
+import os
+import queue
+import threading
+
+
+def landmarker_options(model_dir, running_mode_name):
+    """PoseLandmarkerOptions for the bundled heavy model in IMAGE or VIDEO running mode."""
+    import mediapipe as mp
+    model_path = os.path.join(model_dir, 'pose_landmarker_heavy.task')
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"MediaPipe task file '{model_path}' not found.")
+
+    return mp.tasks.vision.PoseLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+        running_mode=getattr(mp.tasks.vision.RunningMode, running_mode_name),
+        min_pose_detection_confidence=0.5,
+        min_pose_presence_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+class VideoLandmarker:
+    """
+    A VIDEO-mode PoseLandmarker checked out of a LandmarkerPool.
+    MediaPipe requires strictly increasing timestamps for the lifetime of a landmarker, so each
+    lease continues from where the previous clip left off (plus a gap that forces re-detection).
+    """
+    CLIP_GAP_MS = 10_000
+
+    def __init__(self, landmarker):
+        self.landmarker = landmarker
+        self._base_ms = 0
+        self._last_ms = -1
+
+    def begin_clip(self):
+        self._base_ms = self._last_ms + self.CLIP_GAP_MS
+
+    def timestamp_ms(self, frame_idx, fps):
+        """Maps a frame index of the current clip to a monotonic MediaPipe timestamp."""
+        fps = fps if fps and fps > 0 else 30.0
+        ts = self._base_ms + int(frame_idx * 1000 / fps)
+        ts = max(ts, self._last_ms + 1)
+        self._last_ms = ts
+        return ts
+
+    def detect_for_video(self, mp_image, timestamp_ms):
+        return self.landmarker.detect_for_video(mp_image, timestamp_ms)
+
+
+class LandmarkerPool:
+    """Bounded pool of VIDEO-mode landmarkers, created on demand, one per concurrent video request."""
+
+    def __init__(self, factory, size=2):
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.size = size
+
+    def prewarm(self, count=1):
+        """Builds `count` trackers up front so the first video requests don't pay for graph creation."""
+        for _ in range(min(count, self.size) - self._idle.qsize()):
+            self._idle.put(VideoLandmarker(self._factory()))
+        return self
+
+    @contextlib.contextmanager
+    def lease(self):
+        self._slots.acquire()
+        try:
+            try:
+                tracker = self._idle.get_nowait()
+            except queue.Empty:
+                tracker = VideoLandmarker(self._factory())
+            tracker.begin_clip()
+            try:
+                yield tracker
+            finally:
+                self._idle.put(tracker)
+        finally:
+            self._slots.release()
@@ -0,0 +1,77 @@
+import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select
+from sqlalchemy.orm import Session
+
+import database
+
+# --- Schema Migrations ---
+# `Base.metadata.create_all` creates missing tables (with their indexes) but never touches tables
+# that already exist, so changes to existing tables are shipped as numbered steps here. Each step
+# runs once per database, in order, inside its own transaction, and is recorded in
+# `schema_migrations`. Steps must be idempotent: on a fresh database create_all has usually
+# already produced what they add.
+
+_migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _migrations_metadata,
+    Column("name", String, primary_key=True),
+    Column("applied_date", DateTime, nullable=False),
+)
+
+
+def _create_model_indexes(connection, *table_names):
+    existing_tables = set(inspect(connection).get_table_names())
+    for name in table_names:
+        if name not in existing_tables:
+            continue
+        for index in database.Base.metadata.tables[name].indexes:
+            index.create(bind=connection, checkfirst=True)
+    if connection.dialect.name == "sqlite":
+        # Refresh planner statistics so SQLite actually picks the new indexes.
+        connection.exec_driver_sql("ANALYZE")
+
+
+def _0001_user_date_indexes(connection):
+    _create_model_indexes(connection, "yoga_sessions", "journal_entries", "chat_history", "calendar_plans")
+
+
+def _0002_backfill_progress_aggregates(connection):
+    # The aggregate tables are created empty by create_all; fill them from existing sessions.
+    import progress_stats
+    db = Session(bind=connection)
+    try:
+        progress_stats.backfill(db)
+    finally:
+        db.close()
+
+
+MIGRATIONS = [
+    ("0001_user_date_indexes", _0001_user_date_indexes),
+    ("0002_backfill_progress_aggregates", _0002_backfill_progress_aggregates),
+]
+
+
+def run_migrations(engine=None):
+    """Applies pending migrations; returns the names applied in this call."""
+    engine = engine or database.engine
+    _migrations_metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        applied = set(connection.execute(select(schema_migrations.c.name)).scalars())
+
+    newly_applied = []
+    for name, step in MIGRATIONS:
+        if name in applied:
+            continue
+        print(f"Applying migration {name}...")
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(schema_migrations.insert().values(name=name, applied_date=datetime.datetime.utcnow()))
+        newly_applied.append(name)
+    return newly_applied
+
+
+if __name__ == "__main__":
+    # Upgrade an existing database in place:  python migrations.py
+    applied = run_migrations()
+    print(f"Applied: {', '.join(applied)}" if applied else "Database schema is up to date.")
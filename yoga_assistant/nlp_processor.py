@@ -1,53 +1,154 @@
 import os
-import google.generativeai as genai
+import re
+import json
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-else:
-    model = None
+# Configure Gemini on first use: google.generativeai is a heavy import that auth-only
+# deployments (and every feedback batch without an API key) never need.
+_model = None
+_model_lock = threading.Lock()
+
+def _gemini_model():
+    global _model
+    if not GEMINI_API_KEY:
+        return None
+    with _model_lock:
+        if _model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            _model = genai.GenerativeModel('gemini-1.5-flash')
+        return _model
+
+SENTIMENTS = ("POSITIVE", "NEGATIVE", "NEUTRAL")
+# After a failed request (outage, quota/rate limit) Gemini is skipped for this long.
+GEMINI_COOLDOWN_SECONDS = float(os.getenv("FEEDBACK_GEMINI_COOLDOWN_SECONDS", "60"))
+_gemini_retry_at = 0.0
+
+# --- Local Lexicon Scorer ---
+# Offline fallback when Gemini is not configured, unavailable or rate limited. Scores are on the
+# same 0.0-1.0 scale (0.5 = neutral); a negation word flips the polarity of the next few words
+# up to the end of the clause.
+POSITIVE_WORDS = {
+    "good", "great", "amazing", "awesome", "love", "loved", "enjoy", "enjoyed", "relaxed", "relaxing",
+    "calm", "peaceful", "better", "best", "strong", "stronger", "energized", "energetic", "refreshed",
+    "happy", "easy", "comfortable", "flexible", "balanced", "stable", "improved", "improving", "fun",
+    "nice", "helpful", "progress", "focused", "light", "loose", "grounded", "wonderful", "fantastic",
+}
+NEGATIVE_WORDS = {
+    "bad", "pain", "painful", "hurt", "hurts", "hurting", "sore", "ache", "aching", "tight", "stiff",
+    "tired", "exhausted", "hard", "difficult", "struggle", "struggled", "struggling", "worse", "worst",
+    "uncomfortable", "wobbly", "unstable", "dizzy", "strain", "strained", "injury", "injured", "boring",
+    "frustrated", "frustrating", "stressed", "anxious", "weak", "cramp", "cramps", "sad", "awful",
+}
+NEGATIONS = {"not", "no", "never", "dont", "didnt", "doesnt", "isnt", "wasnt", "cant", "couldnt", "without"}
+NEGATION_SCOPE = 3
+
+_TOKEN = re.compile(r"[a-z']+|[.,;:!?]")
+
+
+def score_feedback_locally(text: str) -> dict:
+    """Lexicon-based sentiment: no network, deterministic, microseconds per text."""
+    positive = negative = 0
+    negated_for = 0
+    for word in _TOKEN.findall(text.lower()):
+        word = word.replace("'", "")
+        if not word:
+            continue
+        if not word[0].isalpha():
+            negated_for = 0
+            continue
+        if word in NEGATIONS:
+            negated_for = NEGATION_SCOPE
+            continue
+        polarity = 1 if word in POSITIVE_WORDS else -1 if word in NEGATIVE_WORDS else 0
+        if negated_for:
+            polarity = -polarity
+            negated_for -= 1
+        if polarity > 0:
+            positive += 1
+        elif polarity < 0:
+            negative += 1
+
+    if positive == negative:
+        sentiment, score = "NEUTRAL", 0.5
+    else:
+        score = round(0.5 + 0.5 * (positive - negative) / (positive + negative), 2)
+        sentiment = "POSITIVE" if score > 0.5 else "NEGATIVE"
+    return {"sentiment": sentiment, "sentiment_score": score, "source": "lexicon"}
+
+
+# --- Gemini Batch Analysis ---
+def _extract_json(result_text: str):
+    """Pulls the first JSON array/object out of a model reply (code fences, prose around it, ...)."""
+    result_text = result_text.strip()
+    if "```" in result_text:
+        fenced = re.search(r"```(?:json)?\s*(.*?)```", result_text, re.S)
+        if fenced:
+            result_text = fenced.group(1).strip()
+    start = min((i for i in (result_text.find("["), result_text.find("{")) if i >= 0), default=-1)
+    end = max(result_text.rfind("]"), result_text.rfind("}"))
+    if start < 0 or end < start:
+        raise ValueError("No JSON found in model response")
+    return json.loads(result_text[start:end + 1])
 
-def analyze_feedback_text(text: str) -> dict:
-    """Analyzes user feedback using the Gemini API for sentiment."""
-    
-    if not model:
-        return {
-            "sentiment": "unknown",
-            "sentiment_score": 0.0,
-            "error": "Gemini API not configured"
-        }
 
+def _normalize_analysis(item):
+    sentiment = str(item.get("sentiment", "")).strip().upper()
+    score = float(item.get("sentiment_score"))
+    if sentiment not in SENTIMENTS or not 0.0 <= score <= 1.0:
+        raise ValueError(f"Invalid analysis: {item}")
+    return {"sentiment": sentiment, "sentiment_score": round(score, 2), "source": "gemini"}
+
+
+def analyze_feedback_batch(texts: list) -> list:
+    """
+    Analyzes many feedback texts with a single Gemini request; returns one dict per text, in order.
+    Items the model skipped or mangled (or the whole batch, if the request fails) are scored
+    with the local lexicon instead.
+    """
+    global _gemini_retry_at
+    if not texts:
+        return []
+    if not GEMINI_API_KEY or time.monotonic() < _gemini_retry_at:
+        return [score_feedback_locally(text) for text in texts]
+
+    prompt = (
+        "Analyze the sentiment of each of these yoga feedback texts. "
+        "Respond ONLY with a JSON array containing one object per text, in this exact format: "
+        "[{\"id\": 0, \"sentiment\": \"POSITIVE/NEGATIVE/NEUTRAL\", \"sentiment_score\": 0.0-1.0}]\n\n"
+        + json.dumps([{"id": i, "text": text} for i, text in enumerate(texts)])
+    )
     try:
-        prompt = (
-            f"Analyze the sentiment of this yoga feedback: '{text}'. "
-            "Respond ONLY with a JSON object in this exact format: "
-            "{\"sentiment\": \"POSITIVE/NEGATIVE/NEUTRAL\", \"sentiment_score\": 0.0-1.0}"
-        )
-        
-        response = model.generate_content(prompt)
-        # Simple extraction of JSON from response text
-        result_text = response.text.strip()
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
-            
-        import json
-        analysis = json.loads(result_text)
-        
-        return {
-            "sentiment": analysis.get('sentiment', 'NEUTRAL'),
-            "sentiment_score": analysis.get('sentiment_score', 0.5)
-        }
-        
+        response = _gemini_model().generate_content(prompt)
+        result_text = response.text
     except Exception as e:
-        print(f"Error during Gemini sentiment analysis: {e}")
-        return {
-            "sentiment": "error",
-            "sentiment_score": 0.0
-        }
\ No newline at end of file
+        _gemini_retry_at = time.monotonic() + GEMINI_COOLDOWN_SECONDS
+        print(f"Error during Gemini sentiment analysis, using local scorer: {e}")
+        return [score_feedback_locally(text) for text in texts]
+
+    results = [None] * len(texts)
+    try:
+        analyses = _extract_json(result_text)
+        if isinstance(analyses, dict):
+            analyses = [analyses]
+        for position, item in enumerate(analyses):
+            try:
+                index = int(item.get("id", position))
+                if 0 <= index < len(texts) and results[index] is None:
+                    results[index] = _normalize_analysis(item)
+            except (TypeError, ValueError, AttributeError):
+                continue
+    except (ValueError, TypeError) as e:  # ValueError includes json.JSONDecodeError
+        print(f"Could not parse Gemini sentiment response, using local scorer: {e}")
+
+    return [result or score_feedback_locally(text) for result, text in zip(results, texts)]
+
+
+def analyze_feedback_text(text: str) -> dict:
+    """Analyzes user feedback using the Gemini API for sentiment."""
+    return analyze_feedback_batch([text])[0]
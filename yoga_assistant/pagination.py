@@ -0,0 +1,68 @@
+import base64
+import datetime
+import json
+import os
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# --- Keyset Pagination ---
+# History endpoints page on (date column, id): the cursor is the sort key of the last row sent,
+# so each page is an index range scan (see the (user_id, date) indexes) however deep the client
+# has paged. Cursors are opaque, URL-safe strings.
+DEFAULT_PAGE_SIZE = int(os.getenv("HISTORY_DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "500"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(date_value, row_id):
+    payload = json.dumps([date_value.isoformat() if date_value else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.datetime.fromisoformat(date_value) if date_value else None), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields, model_cls, always=("id",)):
+    """Validates a comma-separated `fields` projection against a response model; None = all fields."""
+    if not fields:
+        return None
+    allowed = set(model_cls.model_fields)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *requested]))
+
+
+def paginate(query, model, date_column, descending=True, cursor=None, limit=None):
+    """
+    Applies keyset ordering and paging to `query` on (date_column, model.id). `limit` defaults to
+    DEFAULT_PAGE_SIZE and is capped at MAX_PAGE_SIZE, so a response is always bounded.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor is not None:
+        last_date, last_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(date_column < last_date, and_(date_column == last_date, model.id < last_id)))
+        else:
+            query = query.filter(or_(date_column > last_date, and_(date_column == last_date, model.id > last_id)))
+
+    if descending:
+        query = query.order_by(date_column.desc(), model.id.desc())
+    else:
+        query = query.order_by(date_column.asc(), model.id.asc())
+
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, date_column.key), last.id)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+# Resolved next to this module so loading no longer depends on the working directory.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_PATH = os.path.join(BASE_DIR, 'pose_templates.json')
+IMAGES_DIR = os.path.join(BASE_DIR, 'reference_images')
+
+
+# --- Compiled Templates ---
+# Each template is compiled once into parallel arrays (angle names, ideals, thresholds) plus the
+# human-readable angle labels used in feedback, so scoring never walks the JSON dict per frame.
+def compile_templates(templates):
+    compiled = {}
+    for pose_key, template in templates.items():
+        template_angles = template.get('angles', {})
+        names = list(template_angles)
+        compiled[pose_key] = {
+            "angles": names,
+            "labels": [name.replace('_', ' ') for name in names],
+            "ideal_values": [template_angles[n]['ideal'] for n in names],
+            "threshold_values": [template_angles[n]['threshold'] for n in names],
+            "ideal": np.array([template_angles[n]['ideal'] for n in names], dtype=np.float64),
+            "threshold": np.array([template_angles[n]['threshold'] for n in names], dtype=np.float64),
+        }
+    return compiled
+
+
+def build_exercises(templates, images):
+    exercises = []
+    for key, data in templates.items():
+        if key == "alanasana":
+            continue
+
+        # Match key to image filename
+        # e.g. adho_mukha_svanasana -> Adho Mukha Svanasana.jpeg/jpg
+        display_name = key.replace("_", " ").title()
+        thumbnail = ""
+        for img in images:
+            if img.lower().startswith(display_name.lower()):
+                thumbnail = f"images/{img}"
+                break
+
+        exercises.append({
+            "id": key,
+            "name": display_name,
+            "description": data.get("description", ""),
+            "thumbnail": thumbnail,
+            "category": "Balance" if "vrksasana" in key or "chandrasana" in key else "Strength" if "virabhadrasana" in key or "phalakasana" in key else "Flexibility",
+            "angles": data.get("angles", {})
+        })
+    return exercises
+
+
+# --- Registry ---
+class PoseCatalog:
+    """
+    Loads pose_templates.json (and the reference image listing) once and serves the raw templates,
+    their compiled scoring arrays and the pre-serialized exercise list with its ETag.
+    Everything is rebuilt only when the templates file or image directory mtime changes.
+    """
+
+    def __init__(self, templates_path=TEMPLATES_PATH, images_dir=IMAGES_DIR):
+        self.templates_path = templates_path
+        self.images_dir = images_dir
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._state = None
+
+    def _current_stamp(self):
+        def mtime(path):
+            try:
+                return os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+        return mtime(self.templates_path), mtime(self.images_dir)
+
+    def _load(self):
+        try:
+            with open(self.templates_path, 'r') as f:
+                templates = json.load(f)
+        except FileNotFoundError:
+            print(f"Error: `{self.templates_path}` not found. Please create it.")
+            templates = {}
+        images = os.listdir(self.images_dir) if os.path.exists(self.images_dir) else []
+
+        body = json.dumps(build_exercises(templates, images)).encode()
+        return {
+            "templates": templates,
+            "compiled": compile_templates(templates),
+            "exercises_body": body,
+            "exercises_etag": f'"{hashlib.sha1(body).hexdigest()}"',
+        }
+
+    def _current(self):
+        # One stat() per call; the state dict is swapped atomically so readers never see a mix.
+        stamp = self._current_stamp()
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._state = self._load()
+                    self._stamp = stamp
+        return self._state
+
+    def templates(self):
+        return self._current()["templates"]
+
+    def compiled_templates(self):
+        return self._current()["compiled"]
+
+    def exercises(self):
+        """Returns (serialized exercise list, ETag)."""
+        state = self._current()
+        return state["exercises_body"], state["exercises_etag"]
+
+
+catalog = PoseCatalog()
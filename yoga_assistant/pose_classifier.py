@@ -0,0 +1,155 @@
+import numpy as np
+
+# --- Pose Classifier Backends ---
+# Every backend takes the raw (N, 140) feature matrix (NaN for unseen angles) and returns
+# (pose_names, confidences). Imputation and scaling happen inside the backend.
+
+
+class KerasPoseClassifier:
+    """The training-time stack: SimpleImputer -> StandardScaler -> Keras MLP -> LabelEncoder."""
+    name = "keras"
+
+    def __init__(self, model, imputer, scaler, label_encoder):
+        self.model = model
+        self.imputer = imputer
+        self.scaler = scaler
+        self.label_encoder = label_encoder
+
+    @classmethod
+    def load(cls, model_dir):
+        import os
+        import joblib
+        from tensorflow.keras.models import load_model
+
+        imputer = joblib.load(os.path.join(model_dir, 'col_means.pkl'))
+        # --- Patch for scikit-learn version compatibility ---
+        # Newer versions of scikit-learn expect _fill_dtype on SimpleImputer
+        if not hasattr(imputer, '_fill_dtype'):
+            imputer._fill_dtype = np.float64
+        return cls(
+            load_model(os.path.join(model_dir, 'best_yoga_model.keras')),
+            imputer,
+            joblib.load(os.path.join(model_dir, 'scaler.pkl')),
+            joblib.load(os.path.join(model_dir, 'label_encoder.pkl')),
+        )
+
+    def predict_proba(self, features_matrix):
+        features_imputed = self.imputer.transform(features_matrix)
+        features_scaled = self.scaler.transform(features_imputed)
+        return np.asarray(self.model.predict_on_batch(features_scaled))
+
+    def predict(self, features_matrix):
+        prediction = self.predict_proba(features_matrix)
+        indices = np.argmax(prediction, axis=1)
+        return self.label_encoder.inverse_transform(indices), np.max(prediction, axis=1)
+
+
+def _erf(x):
+    # Abramowitz & Stegun 7.1.26 (|error| < 1.5e-7, below float32 resolution); keeps this backend NumPy-only.
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+
+def _gelu(x):
+    return 0.5 * x * (1.0 + _erf(x * np.float32(1 / np.sqrt(2))))
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+ACTIVATIONS = {"gelu": _gelu, "relu": lambda x: np.maximum(x, 0), "linear": lambda x: x, "softmax": _softmax}
+
+
+class NumpyPoseClassifier:
+    """
+    Pure-NumPy forward pass over weights exported by `export_numpy_classifier`.
+    The imputer's column means are applied with np.where and the scaler is folded into the first
+    Dense layer, so inference is just a few matmuls: no TensorFlow or scikit-learn import at all.
+    """
+    name = "numpy"
+
+    def __init__(self, fill_values, layers, classes):
+        self.fill_values = fill_values
+        self.layers = layers
+        self.classes = classes
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        n_layers = int(data["n_layers"])
+        activations = [str(a) for a in data["activations"]]
+        layers = [(data[f"W{i}"], data[f"b{i}"], ACTIVATIONS[activations[i]]) for i in range(n_layers)]
+        return cls(data["fill_values"], layers, data["classes"])
+
+    def predict_proba(self, features_matrix):
+        features_matrix = np.asarray(features_matrix, dtype=np.float32)
+        h = np.where(np.isnan(features_matrix), self.fill_values, features_matrix)
+        for weights, bias, activation in self.layers:
+            h = activation(h @ weights + bias)
+        return h
+
+    def predict(self, features_matrix):
+        prediction = self.predict_proba(features_matrix)
+        return self.classes[np.argmax(prediction, axis=1)], np.max(prediction, axis=1)
+
+
+def load_classifier(backend, model_dir):
+    """Loads the classifier backend ("keras" or "numpy") from the model directory."""
+    import os
+    if backend == "numpy":
+        return NumpyPoseClassifier.load(os.path.join(model_dir, 'pose_classifier.npz'))
+    if backend == "keras":
+        return KerasPoseClassifier.load(model_dir)
+    raise ValueError(f"Unknown CLASSIFIER_BACKEND '{backend}' (expected 'keras' or 'numpy').")
+
+
+def export_numpy_classifier(keras_classifier, path):
+    """Exports a KerasPoseClassifier to an .npz usable by NumpyPoseClassifier (imputer + scaler fused)."""
+    dense_layers = [layer for layer in keras_classifier.model.layers if layer.__class__.__name__ == "Dense"]
+    skipped = {layer.__class__.__name__ for layer in keras_classifier.model.layers} - {"Dense", "Dropout", "InputLayer"}
+    if skipped:
+        raise ValueError(f"Unsupported layers for NumPy export: {sorted(skipped)}")
+
+    fill_values = np.asarray(keras_classifier.imputer.statistics_, dtype=np.float64)
+    if np.isnan(fill_values).any():
+        raise ValueError("Imputer has empty columns; cannot fuse preprocessing.")
+    mean = np.asarray(keras_classifier.scaler.mean_, dtype=np.float64)
+    scale = np.asarray(keras_classifier.scaler.scale_, dtype=np.float64)
+
+    arrays = {}
+    activations = []
+    for i, layer in enumerate(dense_layers):
+        weights, bias = (np.asarray(w, dtype=np.float64) for w in layer.get_weights())
+        if i == 0:
+            # (x - mean) / scale @ W + b  ==  x @ (W / scale) + (b - (mean / scale) @ W)
+            bias = bias - (mean / scale) @ weights
+            weights = weights / scale[:, None]
+        arrays[f"W{i}"] = weights.astype(np.float32)
+        arrays[f"b{i}"] = bias.astype(np.float32)
+        activations.append(layer.get_config()["activation"])
+
+    np.savez(
+        path,
+        n_layers=len(dense_layers),
+        activations=np.array(activations),
+        fill_values=fill_values.astype(np.float32),
+        classes=np.asarray(keras_classifier.label_encoder.classes_).astype(str),
+        **arrays,
+    )
+    return path
+
+
+if __name__ == "__main__":
+    # Re-export after retraining:  python pose_classifier.py [model_dir]
+    import os
+    import sys
+
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else 'YOGA_NOTEBOOK'
+    out_path = os.path.join(model_dir, 'pose_classifier.npz')
+    export_numpy_classifier(KerasPoseClassifier.load(model_dir), out_path)
+    print(f"Exported NumPy classifier to {out_path}")
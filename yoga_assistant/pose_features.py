@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+# --- Landmark & Angle Definitions ---
+IDX = {
+    'right_shoulder': 12, 'right_elbow': 14, 'right_wrist': 16,
+    'right_hip': 24,      'right_knee': 26,  'right_ankle': 28,
+    'left_shoulder': 11,  'left_elbow': 13,  'left_wrist': 15,
+    'left_hip': 23,       'left_knee': 25,   'left_ankle': 27
+}
+
+ANGLE_DEFS = {
+    'angle_right_elbow': ('right_shoulder', 'right_elbow', 'right_wrist'),
+    'angle_left_elbow': ('left_shoulder', 'left_elbow', 'left_wrist'),
+    'angle_right_shoulder': ('right_hip', 'right_shoulder', 'right_elbow'),
+    'angle_left_shoulder': ('left_hip', 'left_shoulder', 'left_elbow'),
+    'angle_right_hip': ('right_shoulder', 'right_hip', 'right_knee'),
+    'angle_left_hip': ('left_shoulder', 'left_hip', 'left_knee'),
+    'angle_right_knee': ('right_hip', 'right_knee', 'right_ankle'),
+    'angle_left_knee': ('left_hip', 'left_knee', 'left_ankle')
+}
+
+
+# --- Helper Functions ---
+def calculate_angle(a, b, c):
+    """Calculates the angle at point b given points a, b, and c."""
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    ba, bc = a - b, c - b
+    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
+    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
+    return np.degrees(np.arccos(cosine_angle))
+
+
+# --- Vectorized Angle Engine ---
+NUM_LANDMARKS = 33
+ANGLE_NAMES = list(ANGLE_DEFS)
+LANDMARK_FEATURE_NAMES = [f'landmark_{i}_{k}' for i in range(NUM_LANDMARKS) for k in 'xyzv']
+FEATURE_NAMES = LANDMARK_FEATURE_NAMES + ANGLE_NAMES
+
+# (num_angles, 3) landmark indices of the (a, b, c) joints of every angle, vertex in the middle.
+_ANGLE_JOINTS = np.array([[IDX[a], IDX[b], IDX[c]] for a, b, c in ANGLE_DEFS.values()])
+
+
+def landmarks_to_array(landmarks):
+    """Packs MediaPipe landmarks into a (33, 4) float array of [x, y, z, visibility]."""
+    return np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks], dtype=np.float64)
+
+
+def compute_angles(landmark_batch, visibility_threshold=0.5):
+    """
+    Computes every joint angle for every frame in one NumPy pass.
+    Takes an (N, 33, 4) array of [x, y, z, visibility] and returns (N, len(ANGLE_NAMES)) degrees,
+    NaN wherever one of the three joints is not visible. Matches `calculate_angle` per element.
+    """
+    landmark_batch = np.asarray(landmark_batch, dtype=np.float64)
+    joints = landmark_batch[:, _ANGLE_JOINTS, :3]  # (N, angles, 3 joints, xyz)
+    ba = joints[:, :, 0] - joints[:, :, 1]
+    bc = joints[:, :, 2] - joints[:, :, 1]
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1) + 1e-6
+    cosine_angle = np.clip(np.einsum('nad,nad->na', ba, bc) / norms, -1.0, 1.0)
+    angles = np.degrees(np.arccos(cosine_angle))
+
+    visible = landmark_batch[:, :, 3] > visibility_threshold
+    angles[~visible[:, _ANGLE_JOINTS].all(axis=-1)] = np.nan
+    return angles
+
+
+def build_feature_matrix(landmark_batch, angles):
+    """Lays out (N, 33, 4) landmarks and (N, angles) into classifier columns (FEATURE_NAMES order)."""
+    landmark_batch = np.asarray(landmark_batch, dtype=np.float64)
+    return np.hstack([landmark_batch.reshape(len(landmark_batch), -1), angles])
+
+
+def features_from_landmark_array(landmark_array, visibility_threshold=0.5):
+    """Builds the classifier feature dict (raw landmarks + joint angles) from a (33, 4) array."""
+    landmark_batch = landmark_array[np.newaxis]
+    angles = compute_angles(landmark_batch, visibility_threshold)
+    return dict(zip(FEATURE_NAMES, build_feature_matrix(landmark_batch, angles)[0]))
+
+
+def features_from_landmarks(landmarks, visibility_threshold=0.5):
+    """Builds the classifier feature dict from MediaPipe landmark objects."""
+    return features_from_landmark_array(landmarks_to_array(landmarks), visibility_threshold)
+
+
+def detect_landmarks(frame, landmarker, timestamp_ms=None):
+    """Runs pose detection on a decoded BGR frame; returns a (33, 4) landmark array or None."""
+    import mediapipe as mp  # deferred: heavy import, only needed once inference actually runs
+
+    try:
+        if frame is None: return None
+
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+        if timestamp_ms is None:
+            detection_result = landmarker.detect(mp_image)
+        else:
+            detection_result = landmarker.detect_for_video(mp_image, timestamp_ms)
+
+        if not detection_result.pose_landmarks: return None
+        return landmarks_to_array(detection_result.pose_landmarks[0])
+    except Exception as e:
+        print(f"Extraction Error: {e}")
+        return None
+
+
+def extract_features_from_frame(frame, landmarker, visibility_threshold=0.5, timestamp_ms=None):
+    """
+    Runs pose detection directly on a decoded BGR frame, without any disk round-trip.
+    Pass `timestamp_ms` to use a VIDEO-mode landmarker (temporal tracking) instead of IMAGE mode.
+    """
+    landmark_array = detect_landmarks(frame, landmarker, timestamp_ms)
+    if landmark_array is None: return None
+    return features_from_landmark_array(landmark_array, visibility_threshold)
+
+
+def extract_features_from_image_bytes(data, landmarker, visibility_threshold=0.5):
+    """Decodes an encoded image (JPEG/PNG/...) straight from memory and extracts its features."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None: return None
+    return extract_features_from_frame(image, landmarker, visibility_threshold)
+
+
+def extract_features_from_image_robust(image_path, landmarker, visibility_threshold=0.5):
+    image = cv2.imread(image_path)
+    if image is None: return None
+    return extract_features_from_frame(image, landmarker, visibility_threshold)
@@ -0,0 +1,247 @@
+import datetime
+
+from sqlalchemy import func
+
+import database
+from database import YogaSession, UserDailyStat, UserProgress
+
+# --- Incremental Progress Aggregates ---
+# `record_sessions` is called in the same transaction that inserts sessions and folds them into
+# user_daily_stats (one row per user/day/pose) and user_progress (one row per user, incl. streaks).
+# Sessions only ever arrive "now", so a streak normally extends in O(1); a backdated day falls back
+# to recomputing streaks from the user's daily rows, which is still far smaller than the sessions.
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):  # func.date() on SQLite
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+def compute_streaks(days):
+    """(current, longest) for ascending distinct days; `current` is the run ending at the last day."""
+    current = longest = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day == previous + datetime.timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def _new_progress(user_id):
+    return UserProgress(
+        user_id=user_id, total_sessions=0, total_duration=0, accuracy_sum=0.0, accuracy_count=0,
+        current_streak=0, longest_streak=0
+    )
+
+
+_COUNTERS = ("session_count", "total_duration", "accuracy_sum", "accuracy_count")
+_PROGRESS_COUNTERS = {"session_count": "total_sessions", "total_duration": "total_duration",
+                      "accuracy_sum": "accuracy_sum", "accuracy_count": "accuracy_count"}
+
+
+def _increment(db, model, key, increments):
+    """
+    INSERT the row `key` + `increments`, or add `increments` to the existing row, in one atomic
+    statement, so concurrent saves for the same user neither lose counts nor collide on the key.
+    """
+    table = model.__table__
+    values = {**key, **increments}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + stmt.excluded[name] for name in increments}
+        )
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in increments})
+    else:
+        # Generic fallback: lock the row if it exists, insert it otherwise.
+        row = db.get(model, tuple(key.values()), with_for_update=True, populate_existing=True)
+        if row is None:
+            db.add(model(**values))
+        else:
+            for name, amount in increments.items():
+                setattr(row, name, getattr(row, name) + amount)
+        db.flush()
+        return
+    db.execute(stmt)
+
+
+def record_sessions(db, user_id: int, sessions):
+    """
+    Folds new sessions into the user's aggregates. `sessions` are dicts with date, pose_name,
+    duration and accuracy_score (as inserted into yoga_sessions). Does not commit.
+    Counters are incremented in SQL and the streak is updated under a row lock, so concurrent
+    saves for the same user (a background video job and an image upload) are safe.
+    """
+    buckets = {}
+    for s in sessions:
+        key = (_as_date(s["date"]), s["pose_name"])
+        count, duration, acc_sum, acc_count = buckets.get(key, (0, 0, 0.0, 0))
+        accuracy = s.get("accuracy_score")
+        buckets[key] = (
+            count + 1,
+            duration + (s.get("duration") or 0),
+            acc_sum + (accuracy or 0.0),
+            acc_count + (accuracy is not None),
+        )
+    if not buckets:
+        return
+
+    totals = dict.fromkeys(_COUNTERS, 0)
+    for (day, pose_name), counters in buckets.items():
+        increments = dict(zip(_COUNTERS, counters))
+        _increment(db, UserDailyStat, {"user_id": user_id, "day": day, "pose_name": pose_name}, increments)
+        for name, amount in increments.items():
+            totals[name] += amount
+    _increment(db, UserProgress, {"user_id": user_id},
+               {_PROGRESS_COUNTERS[name]: amount for name, amount in totals.items()})
+
+    # The row exists now; lock it (a no-op on SQLite, whose writer lock we already hold) for the streak update.
+    progress = db.get(UserProgress, user_id, with_for_update=True, populate_existing=True)
+
+    backdated = False
+    for day in sorted({day for day, _ in buckets}):
+        if progress.last_day is None:
+            progress.first_day = progress.last_day = day
+            progress.current_streak = 1
+        elif day == progress.last_day:
+            continue
+        elif day == progress.last_day + datetime.timedelta(days=1):
+            progress.current_streak += 1
+            progress.last_day = day
+        elif day > progress.last_day:
+            progress.current_streak = 1
+            progress.last_day = day
+        else:
+            backdated = True
+        progress.first_day = min(progress.first_day, day)
+        progress.longest_streak = max(progress.longest_streak, progress.current_streak)
+
+    if backdated:
+        db.flush()
+        days = [row[0] for row in db.query(UserDailyStat.day).filter(UserDailyStat.user_id == user_id)
+                .distinct().order_by(UserDailyStat.day.asc())]
+        progress.current_streak, progress.longest_streak = compute_streaks(days)
+        progress.last_day = days[-1]
+    progress.updated_date = datetime.datetime.utcnow()
+
+
+def current_streak(progress, today=None):
+    """The streak as /get-streak/ reports it: 0 unless the user practiced today or yesterday."""
+    if progress is None or progress.last_day is None:
+        return 0
+    today = today or datetime.date.today()
+    if progress.last_day not in (today, today - datetime.timedelta(days=1)):
+        return 0
+    return progress.current_streak
+
+
+def _average(total, count):
+    return round(total / count, 1) if count else None
+
+
+def progress_summary(db, user_id: int, days=30, today=None):
+    """Totals, streaks and the last `days` days of per-pose aggregates for the progress views."""
+    today = today or datetime.date.today()
+    progress = db.get(UserProgress, user_id)
+    stats = db.query(UserDailyStat).filter(
+        UserDailyStat.user_id == user_id, UserDailyStat.day > today - datetime.timedelta(days=days)
+    ).order_by(UserDailyStat.day.asc()).all()
+
+    timeline = {}
+    for stat in stats:
+        day = timeline.setdefault(stat.day, {
+            "day": stat.day.isoformat(), "session_count": 0, "total_duration": 0,
+            "_acc_sum": 0.0, "_acc_count": 0, "poses": {}
+        })
+        day["session_count"] += stat.session_count
+        day["total_duration"] += stat.total_duration
+        day["_acc_sum"] += stat.accuracy_sum
+        day["_acc_count"] += stat.accuracy_count
+        day["poses"][stat.pose_name] = {
+            "session_count": stat.session_count,
+            "total_duration": stat.total_duration,
+            "average_accuracy": _average(stat.accuracy_sum, stat.accuracy_count),
+        }
+    for day in timeline.values():
+        day["average_accuracy"] = _average(day.pop("_acc_sum"), day.pop("_acc_count"))
+
+    if progress is None:
+        progress = _new_progress(user_id)
+    return {
+        "total_sessions": progress.total_sessions,
+        "total_duration": progress.total_duration,
+        "average_accuracy": _average(progress.accuracy_sum, progress.accuracy_count),
+        "current_streak": current_streak(progress, today),
+        "longest_streak": progress.longest_streak,
+        "first_day": progress.first_day.isoformat() if progress.first_day else None,
+        "last_day": progress.last_day.isoformat() if progress.last_day else None,
+        "days": list(timeline.values()),
+    }
+
+
+def backfill(db):
+    """Rebuilds every user's aggregates from yoga_sessions. Flushes but does not commit; returns the user count."""
+    db.query(UserDailyStat).delete(synchronize_session=False)
+    db.query(UserProgress).delete(synchronize_session=False)
+
+    day_column = func.date(YogaSession.date)
+    rows = db.query(
+        YogaSession.user_id, day_column, YogaSession.pose_name, func.count(YogaSession.id),
+        func.coalesce(func.sum(YogaSession.duration), 0), func.coalesce(func.sum(YogaSession.accuracy_score), 0.0),
+        func.count(YogaSession.accuracy_score)
+    ).filter(YogaSession.date.isnot(None)).group_by(
+        YogaSession.user_id, day_column, YogaSession.pose_name
+    ).order_by(YogaSession.user_id, day_column).all()
+
+    users, user_days = {}, {}
+    for user_id, day, pose_name, count, duration, acc_sum, acc_count in rows:
+        day = _as_date(day)
+        db.add(UserDailyStat(
+            user_id=user_id, day=day, pose_name=pose_name, session_count=count,
+            total_duration=int(duration), accuracy_sum=float(acc_sum), accuracy_count=acc_count
+        ))
+        progress = users.get(user_id)
+        if progress is None:
+            progress = users[user_id] = _new_progress(user_id)
+            user_days[user_id] = []
+        progress.total_sessions += count
+        progress.total_duration += int(duration)
+        progress.accuracy_sum += float(acc_sum)
+        progress.accuracy_count += acc_count
+        days = user_days[user_id]
+        if not days or days[-1] != day:
+            days.append(day)
+
+    for user_id, progress in users.items():
+        days = user_days[user_id]
+        progress.first_day, progress.last_day = days[0], days[-1]
+        progress.current_streak, progress.longest_streak = compute_streaks(days)
+        progress.updated_date = datetime.datetime.utcnow()
+        db.add(progress)
+    db.flush()
+    return len(users)
+
+
+if __name__ == "__main__":
+    # Rebuild aggregates for an existing database:  python progress_stats.py
+    database.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        count = backfill(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt progress aggregates for {count} users.")
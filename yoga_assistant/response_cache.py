@@ -0,0 +1,131 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str):
+    """Lower-cases, drops punctuation and collapses whitespace: "Hi!!" and " hi" share one key."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", query.lower())).strip()
+
+
+def char_ngrams(text: str, n=3):
+    padded = f" {text} "
+    return frozenset(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+
+def query_tokens(text: str):
+    return frozenset(text.split())
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of coach answers keyed on (user, context fingerprint, normalized query).
+    The fingerprint changes whenever the user's sessions, journals or plans do, so answers are
+    never served against stale history. With `similarity` > 0, a miss falls back to the most
+    similar cached query for the same user and fingerprint (character-trigram Jaccard index), but
+    only among queries made of exactly the same words: "warrior 1" never answers "warrior 2".
+    """
+
+    def __init__(self, ttl_seconds=900, max_entries=2048, similarity=0.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._entries = OrderedDict()  # (user_id, fingerprint, query) -> (expires_at, response, ngrams, tokens)
+        self._buckets = {}  # (user_id, fingerprint) -> {query} for similarity scans
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        del self._entries[key]
+        bucket = self._buckets.get(key[:2])
+        if bucket is not None:
+            bucket.discard(key[2])
+            if not bucket:
+                del self._buckets[key[:2]]
+
+    def get(self, user_id: int, fingerprint: str, query: str):
+        """Returns a cached response or None."""
+        normalized = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            key = (user_id, fingerprint, normalized)
+            entry = self._entries.get(key)
+            if entry and entry[0] <= now:
+                self._drop(key)
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[1]
+
+            if self.similarity > 0:
+                grams, tokens = char_ngrams(normalized), query_tokens(normalized)
+                best_key, best_score = None, self.similarity
+                for candidate in self._buckets.get((user_id, fingerprint), ()):
+                    candidate_key = (user_id, fingerprint, candidate)
+                    candidate_entry = self._entries[candidate_key]
+                    # Any differing word (a number, a pose, a day) can change the answer.
+                    if candidate_entry[0] <= now or candidate_entry[3] != tokens:
+                        continue
+                    score = jaccard(grams, candidate_entry[2])
+                    if score >= best_score:
+                        best_key, best_score = candidate_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.similar_hits += 1
+                    return self._entries[best_key][1]
+
+            self.misses += 1
+            return None
+
+    def put(self, user_id: int, fingerprint: str, query: str, response: str):
+        normalized = normalize_query(query)
+        key = (user_id, fingerprint, normalized)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response, char_ngrams(normalized), query_tokens(normalized))
+            self._buckets.setdefault(key[:2], set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache(
+    ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "900")),
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048")),
+    similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+)
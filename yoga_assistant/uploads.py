@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+# --- Upload Limits ---
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_IMAGE_UPLOAD_BYTES = int(float(os.getenv("MAX_IMAGE_UPLOAD_MB", "15")) * 1024 * 1024)
+MAX_VIDEO_UPLOAD_BYTES = int(float(os.getenv("MAX_VIDEO_UPLOAD_MB", "500")) * 1024 * 1024)
+# Room for the multipart framing (boundaries, part headers) around the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large(max_bytes):
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit."
+    )
+
+
+class UploadLimitMiddleware:
+    """
+    Enforces upload limits before Starlette spools the multipart body to disk. `limits` maps a
+    request path to its max file size. A declared Content-Length over the limit is refused without
+    reading the body; otherwise the body is counted as it arrives and the request fails with 413
+    as soon as it goes over, instead of after the whole upload has been stored.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = max_bytes + MULTIPART_OVERHEAD
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_body:
+            response = JSONResponse({"detail": _too_large(max_bytes).detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    # Surfaces through request.form() as a regular 413 response.
+                    raise _too_large(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def read_upload_limited(file: UploadFile, max_bytes=MAX_IMAGE_UPLOAD_BYTES) -> bytes:
+    """Reads a (small) upload into memory, refusing it when it exceeds `max_bytes`."""
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    contents = await file.read(max_bytes + 1)
+    if len(contents) > max_bytes:
+        raise _too_large(max_bytes)
+    return contents
+
+
+def _copy_to_named_file(source, suffix, dir):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=dir) as tmp:
+        try:
+            source.seek(0)
+            shutil.copyfileobj(source, tmp, UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return tmp.name
+
+
+async def save_upload_to_disk(file: UploadFile, suffix, max_bytes=MAX_VIDEO_UPLOAD_BYTES, dir=None) -> str:
+    """
+    Copies an upload to a new named file and returns its path. Starlette has already spooled the
+    body to an anonymous temp file, which cannot be renamed, so the copy runs on a worker thread to
+    keep the event loop free. The partial file is removed if the copy fails.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    return await run_in_threadpool(_copy_to_named_file, file.file, suffix, dir)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import database
+from database import User, YogaSession, JournalEntry, ChatHistory, CalendarPlan
+
+
+def build_user_context(db, user_id: int):
+    """Collects the coach's view of a user (profile, recent sessions, journals, chats, plans). None if unknown."""
+    user_data = {}
+
+    # 1. Fetch User Info
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        return None
+
+    user_data['username'] = user.username
+
+    # 2. Fetch Last 10 Sessions
+    sessions = db.query(YogaSession).filter(YogaSession.user_id == user_id).order_by(YogaSession.date.desc()).limit(10).all()
+    user_data['recent_sessions'] = [
+        {
+            "pose": s.pose_name,
+            "accuracy": s.accuracy_score,
+            "feedback": s.feedback_text,
+            "notes": s.feedback_notes,
+            "duration": s.duration,
+            "date": s.date.isoformat()
+        } for s in sessions
+    ]
+
+    # 3. Fetch Last 5 Journal Entries
+    journals = db.query(JournalEntry).filter(JournalEntry.user_id == user_id).order_by(JournalEntry.date.desc()).limit(5).all()
+    user_data['journal_entries'] = [
+        {
+            "entry": j.entry_text,
+            "date": j.date.isoformat()
+        } for j in journals
+    ]
+
+    # 4. Fetch Last 5 Chat Interactions
+    chats = db.query(ChatHistory).filter(ChatHistory.user_id == user_id).order_by(ChatHistory.created_date.desc()).limit(5).all()
+    user_data['recent_chats'] = [
+        {
+            "user_query": c.user_query,
+            "bot_response": c.bot_response[:100] + "...", # Truncate response to save tokens
+            "date": c.created_date.isoformat()
+        } for c in chats
+    ]
+
+    # 5. Fetch Calendar Plans
+    plans = db.query(CalendarPlan).filter(CalendarPlan.user_id == user_id).order_by(CalendarPlan.planned_date.asc()).limit(10).all()
+    user_data['upcoming_plans'] = [
+        {
+            "title": p.title,
+            "description": p.description,
+            "date": p.planned_date.isoformat(),
+            "status": p.status
+        } for p in plans
+    ]
+    return user_data
+
+
+class UserContextCache:
+    """
+    Per-user snapshot of the coach context, serialized once (compact JSON) and reused by every
+    SQL tool call until a write for that user invalidates it. Entries also expire after
+    `ttl_seconds` so writes made by other worker processes are picked up eventually.
+    Each entry also carries a fingerprint of the data that shapes the coach's answers (everything
+    but the chat log, which every answer itself changes) for keying cached responses.
+    """
+
+    def __init__(self, ttl_seconds=300, max_users=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._entries = OrderedDict()  # user_id -> (expires_at, serialized, fingerprint)
+        self._generations = {}  # user_id -> invalidation count; guards stores racing with writes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int):
+        """Returns the serialized context for `user_id` (None if the user does not exist)."""
+        entry = self._entry(user_id)
+        return entry[1] if entry else None
+
+    def fingerprint(self, user_id: int):
+        """Stable hash of the user's sessions, journals and plans (None if the user does not exist)."""
+        entry = self._entry(user_id)
+        return entry[2] if entry else None
+
+    def _entry(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+
+        db = database.SessionLocal()
+        try:
+            user_data = build_user_context(db, user_id)
+        finally:
+            db.close()
+        if user_data is None:
+            return None
+
+        serialized = json.dumps(user_data, separators=(",", ":"), ensure_ascii=False)
+        stable = {key: value for key, value in user_data.items() if key != "recent_chats"}
+        fingerprint = hashlib.sha1(json.dumps(stable, separators=(",", ":")).encode()).hexdigest()
+        entry = (now + self.ttl_seconds, serialized, fingerprint)
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                # A write was invalidated while we were reading; this snapshot may predate it.
+                return entry
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+user_context_cache = UserContextCache(
+    ttl_seconds=int(os.getenv("USER_CONTEXT_TTL_SECONDS", "300")),
+    max_users=int(os.getenv("USER_CONTEXT_MAX_USERS", "1024"))
+)
@@ -0,0 +1,265 @@
+import collections
+
+import cv2
+import numpy as np
+
+from accuracy_calculator import calculate_pose_accuracy_batch
+from pose_features import compute_angles, build_feature_matrix, detect_landmarks, ANGLE_NAMES
+
+
+def seek_frame(cap, frame_idx):
+    """Positions an open capture so the next grab() returns frame `frame_idx`."""
+    if frame_idx <= 0:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_idx:
+        # Container without accurate seeking: walk there from the start instead.
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        for _ in range(frame_idx):
+            if not cap.grab():
+                break
+
+
+def iter_sampled_frames(cap, sample_interval, start_frame=0, end_frame=None):
+    """
+    Yields (frame_idx, frame) for every `sample_interval`-th frame of an open capture, optionally
+    limited to frames [start_frame, end_frame). Indices are absolute, so a range yields exactly
+    the frames a full pass would. Skipped frames are still decoded by grab(), but never
+    retrieved or converted into a numpy image.
+    """
+    seek_frame(cap, start_frame)
+    frame_idx = start_frame
+    while cap.isOpened() and (end_frame is None or frame_idx < end_frame):
+        if not cap.grab():
+            break
+        if frame_idx % sample_interval == 0:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame_idx, frame
+        frame_idx += 1
+
+
+# --- Adaptive Sampling ---
+# A static hold does not need 4 samples per second. Each sampled frame is shrunk to a small
+# grayscale thumbnail and compared with the previous sample's; while the difference stays low the
+# rate halves step by step down to `min_rate`, and any real movement snaps it back to `max_rate`
+# so transitions are seen at full resolution. Frames in between are still decoded by grab(); only
+# the retrieve() colour conversion/copy and the landmarker/classifier work are skipped for them.
+# Gaps are at most 1/min_rate seconds, usually shorter than a keyframe interval, so seeking across
+# them would decode as much as grabbing does.
+
+class MotionSampler:
+    """
+    Chooses the next sample for `iter_adaptive_frames`. Motion is the mean absolute difference
+    (0-255) between consecutive sample thumbnails: below `low_motion` the pose is treated as held,
+    above `high_motion` as moving.
+    """
+
+    def __init__(self, fps, min_rate=1.0, max_rate=4.0, low_motion=2.0, high_motion=6.0, thumb_width=64):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.min_interval = max(int(self.fps / max_rate), 1)
+        self.max_interval = max(int(self.fps / min_rate), self.min_interval)
+        self.low_motion = low_motion
+        self.high_motion = high_motion
+        self.thumb_width = thumb_width
+        self.interval = self.min_interval
+        self._previous = None
+        self.samples = 0
+
+    def observe(self, frame):
+        """Scores a sampled frame against the previous one and adapts the interval; returns the score."""
+        height, width = frame.shape[:2]
+        thumb_height = max(int(height * self.thumb_width / max(width, 1)), 1)
+        thumb = cv2.resize(frame, (self.thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY) if thumb.ndim == 3 else thumb
+        first = self._previous is None
+        motion = 0.0 if first else float(cv2.absdiff(thumb, self._previous).mean())
+        self._previous = thumb
+        self.samples += 1
+
+        if first or motion > self.high_motion:
+            self.interval = self.min_interval
+        elif motion < self.low_motion:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return motion
+
+
+def iter_adaptive_frames(cap, sampler, start_frame=0, end_frame=None):
+    """Like `iter_sampled_frames`, but the gap to the next sample comes from `sampler` after each frame."""
+    seek_frame(cap, start_frame)
+    frame_idx = next_sample = start_frame
+    while cap.isOpened() and (end_frame is None or frame_idx < end_frame):
+        if not cap.grab():
+            break
+        if frame_idx == next_sample:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            sampler.observe(frame)
+            next_sample = frame_idx + sampler.interval
+            yield frame_idx, frame
+        frame_idx += 1
+
+
+def sample_frames(cap, fps, sampling, start_frame=0, end_frame=None):
+    """
+    Opens the configured sampler over an open capture. `sampling` is a dict with mode ("adaptive"
+    or "fixed"), min_rate, max_rate, low_motion and high_motion. Returns (frames, sampler, frame_step):
+    `sampler` is None for fixed-rate sampling, `frame_step` the frames covered by a full-rate sample.
+    """
+    if sampling["mode"] == "adaptive":
+        sampler = MotionSampler(
+            fps, min_rate=sampling["min_rate"], max_rate=sampling["max_rate"],
+            low_motion=sampling["low_motion"], high_motion=sampling["high_motion"]
+        )
+        return iter_adaptive_frames(cap, sampler, start_frame, end_frame), sampler, sampler.min_interval
+    frame_step = max(int(fps / sampling["max_rate"]), 1) if fps and fps > 0 else 1
+    return iter_sampled_frames(cap, frame_step, start_frame, end_frame), None, frame_step
+
+# --- Frame Labelling ---
+NO_POSE = (None, None, None)
+
+# Lowered threshold to be more inclusive
+MIN_POSE_CONFIDENCE = 0.45
+
+
+def classify_landmarks(landmark_batch, predict):
+    """
+    Classifies and scores a (N, 33, 4) landmark batch in one vectorized pass with `predict`
+    (feature matrix -> (pose_names, confidences)). Returns one (pose, accuracy, feedback) per row;
+    unconfident rows are NO_POSE.
+    """
+    angles = compute_angles(landmark_batch)
+    pose_names, confidences = predict(build_feature_matrix(landmark_batch, angles))
+    confident = confidences > MIN_POSE_CONFIDENCE
+    scores = calculate_pose_accuracy_batch(angles[confident], pose_names[confident], ANGLE_NAMES)
+    labels = [NO_POSE] * len(landmark_batch)
+    for i, pose_name, accuracy, feedback in zip(
+            np.flatnonzero(confident), pose_names[confident], scores["accuracy"], scores["feedback"]):
+        labels[i] = (str(pose_name), float(accuracy), feedback)
+    return labels
+
+
+def label_frames(frames, tracker, fps, predict, batch_size=256):
+    """
+    Yields (frame_idx, pose, accuracy, feedback) for each sampled (frame_idx, frame), in order.
+    Landmarks come from the VIDEO-mode `tracker`; classification runs in batches of `batch_size`.
+    Frames without a detected or confident pose are labelled NO_POSE.
+    """
+    pending = []  # (frame_idx, landmarks or None) in frame order
+
+    def flush():
+        detected = [landmarks for _, landmarks in pending if landmarks is not None]
+        labels = iter(classify_landmarks(np.stack(detected), predict) if detected else ())
+        for frame_idx, landmarks in pending:
+            yield (frame_idx,) + (next(labels) if landmarks is not None else NO_POSE)
+        pending.clear()
+
+    for frame_idx, frame in frames:
+        pending.append((frame_idx, detect_landmarks(frame, tracker, timestamp_ms=tracker.timestamp_ms(frame_idx, fps))))
+        if len(pending) >= batch_size:
+            yield from flush()
+    yield from flush()
+
+
+# --- Temporal Segmentation ---
+# Per-frame predictions flicker; a centered sliding-window majority vote over the sampled labels
+# smooths them, and runs of the same smoothed label become hold segments with real timestamps
+# (frame index / FPS). Memory is bounded by the window; each sample is handled in O(1).
+
+class PoseSegmenter:
+    """
+    Streaming hold segmentation. Feed samples in frame order with `push()`; closed segments are
+    returned as soon as they are known, the rest by `finish()`. A segment is a dict with pose,
+    start_frame, end_frame (exclusive), start_sec, end_sec, duration, accuracy_sum, accuracy_count
+    and feedback. Samples with no pose (label None) break holds; segments shorter than
+    `min_hold_seconds` are dropped as noise.
+    """
+
+    def __init__(self, fps, frame_step=1, window=5, min_hold_seconds=0.0):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.frame_step = max(int(frame_step), 1)
+        self.half = max(int(window), 1) // 2
+        self.min_hold_seconds = min_hold_seconds
+        self._buffer = collections.deque()  # (seq, frame_idx, label, accuracy, feedback)
+        self._counts = collections.Counter()
+        self._pushed = 0
+        self._decided = 0
+        self._smoothed = None
+        self._segment = None
+        self._last_frame = None
+
+    def push(self, frame_idx, label, accuracy=None, feedback=None):
+        """Adds one sample; returns the segments this closed (usually none)."""
+        self._buffer.append((self._pushed, frame_idx, label, accuracy, feedback))
+        self._counts[label] += 1
+        self._pushed += 1
+        if len(self._buffer) > 2 * self.half + 1:
+            self._forget_oldest()
+        closed = []
+        if self._pushed > self.half:
+            # The window centred on sample `pushed - 1 - half` is now complete (truncated at the start).
+            self._decide(self._buffer[-self.half - 1], closed)
+        return closed
+
+    def finish(self, total_frames=None, frame_step=None):
+        """
+        Decides the trailing samples and closes the open segment; returns the remaining segments.
+        The last sample is taken to cover `frame_step` frames (default: the constructor's), capped at `total_frames`.
+        """
+        closed = []
+        while self._decided < self._pushed:
+            seq = self._decided
+            while self._buffer[0][0] < seq - self.half:
+                self._forget_oldest()
+            self._decide(self._buffer[seq - self._buffer[0][0]], closed)
+        if self._last_frame is not None:
+            end_frame = self._last_frame + (frame_step or self.frame_step)
+            if total_frames:
+                end_frame = max(min(end_frame, total_frames), self._last_frame + 1)
+            self._close(end_frame, closed)
+        return closed
+
+    def _forget_oldest(self):
+        _, _, label, _, _ = self._buffer.popleft()
+        self._counts[label] -= 1
+
+    def _decide(self, sample, closed):
+        # The buffer holds exactly this sample's window here.
+        _, frame_idx, label, accuracy, feedback = sample
+        majority, votes = self._counts.most_common(1)[0]
+        if votes * 2 > len(self._buffer):
+            smoothed = majority
+        elif self._decided == 0:
+            smoothed = label
+        else:
+            # No strict majority: keep the current label so near-ties do not split a hold.
+            smoothed = self._smoothed
+
+        if self._decided == 0 or smoothed != self._smoothed:
+            self._close(frame_idx, closed)
+            if smoothed is not None:
+                self._segment = {
+                    "pose": smoothed, "start_frame": frame_idx,
+                    "accuracy_sum": 0.0, "accuracy_count": 0, "feedback": None
+                }
+        if self._segment is not None and label == smoothed and accuracy is not None:
+            self._segment["accuracy_sum"] += float(accuracy)
+            self._segment["accuracy_count"] += 1
+            if feedback:
+                self._segment["feedback"] = feedback
+        self._smoothed = smoothed
+        self._last_frame = frame_idx
+        self._decided += 1
+
+    def _close(self, end_frame, closed):
+        segment, self._segment = self._segment, None
+        if segment is None:
+            return
+        segment["end_frame"] = end_frame
+        segment["start_sec"] = round(segment["start_frame"] / self.fps, 3)
+        segment["end_sec"] = round(end_frame / self.fps, 3)
+        segment["duration"] = round((end_frame - segment["start_frame"]) / self.fps, 3)
+        if segment["duration"] >= self.min_hold_seconds:
+            closed.append(segment)
@@ -0,0 +1,115 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from video_analyzer import sample_frames, label_frames
+
+# --- Parallel Chunked Analysis ---
+# A long clip is split into frame ranges. Each range is decoded, tracked and classified in a
+# separate process with its own landmarker and classifier, so decoding and inference use several
+# cores. Workers return only their range's per-sample labels. The parent concatenates the ranges
+# in frame order and segments the result once, so a hold that spans a range boundary still comes
+# out as a single segment.
+
+
+class PoseLabeler:
+    """A worker process's own VIDEO-mode landmarker and classifier, built once by the pool initializer."""
+
+    def __init__(self, model_dir, classifier_backend):
+        import mediapipe as mp
+        from landmarker_pool import VideoLandmarker, landmarker_options
+        from pose_classifier import load_classifier
+
+        self.classifier = load_classifier(classifier_backend, model_dir)
+        self.tracker = VideoLandmarker(
+            mp.tasks.vision.PoseLandmarker.create_from_options(landmarker_options(model_dir, "VIDEO"))
+        )
+
+    def label(self, frames, fps, batch_size):
+        # Each range is a new clip for the tracker: it re-detects instead of tracking across the gap.
+        self.tracker.begin_clip()
+        return list(label_frames(frames, self.tracker, fps, self.classifier.predict, batch_size))
+
+
+_labeler = None
+
+
+def _init_worker(labeler_factory, factory_args):
+    global _labeler
+    _labeler = labeler_factory(*factory_args)
+
+
+def _analyze_range(video_path, start_frame, end_frame, sampling, batch_size):
+    """Worker: labels the samples in frames [start_frame, end_frame). Returns (samples, last_step)."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames, sampler, frame_step = sample_frames(cap, fps, sampling, start_frame, end_frame)
+        samples = _labeler.label(frames, fps, batch_size)
+        return samples, sampler.interval if sampler else frame_step
+    finally:
+        cap.release()
+
+
+def split_frame_ranges(total_frames, chunks):
+    """Splits [0, total_frames) into up to `chunks` contiguous, near-equal (start, end) ranges."""
+    chunks = max(1, min(chunks, total_frames))
+    bounds = [total_frames * i // chunks for i in range(chunks + 1)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class ChunkedVideoAnalyzer:
+    """
+    Pool of `workers` spawned processes that label frame ranges of a video in parallel.
+    `labeler_factory(*factory_args)` runs once per process and must return an object with
+    `label(frames, fps, batch_size) -> [(frame_idx, pose, accuracy, feedback), ...]`; both must be
+    importable top-level names. Ranges are at least `min_chunk_seconds` long.
+    """
+
+    def __init__(self, workers, labeler_factory=PoseLabeler, factory_args=(), min_chunk_seconds=30.0):
+        self.workers = workers
+        self.min_chunk_seconds = min_chunk_seconds
+        self._labeler_factory = labeler_factory
+        self._factory_args = factory_args
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created on first use; "spawn" keeps the parent's threads and model state out of the workers.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self._labeler_factory, self._factory_args),
+                )
+            return self._executor
+
+    def frame_ranges(self, total_frames, fps):
+        min_frames = max(int(self.min_chunk_seconds * (fps if fps and fps > 0 else 30.0)), 1)
+        return split_frame_ranges(total_frames, min(self.workers, total_frames // min_frames))
+
+    def iter_ranges(self, video_path, total_frames, fps, sampling, batch_size=256):
+        """
+        Submits every range at once and yields (end_frame, samples, last_step) per range in frame
+        order as results arrive; `last_step` is the sampling step after the range's last sample.
+        """
+        ranges = self.frame_ranges(total_frames, fps)
+        pool = self._pool()
+        futures = [pool.submit(_analyze_range, video_path, start, end, sampling, batch_size) for start, end in ranges]
+        try:
+            for (_, end), future in zip(ranges, futures):
+                samples, last_step = future.result()
+                yield end, samples, last_step
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
@@ -1,14 +1,16 @@
 import os
-import json
+import threading
 from datetime import datetime, timedelta
 from crewai import Agent, Task, Crew, LLM
 from crewai.tools import BaseTool
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:  # older crewai releases
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
 
 # --- Local Modules ---
-import database
-from database import User, YogaSession, JournalEntry, ChatHistory, CalendarPlan
+from user_context import user_context_cache
 
 # Load environment variables
 load_dotenv()
@@ -27,64 +29,11 @@ class SQLYogaTool(BaseTool):
             return "Error: user_id is required."
 
         try:
-            # Create a new session for this tool execution
-            db: Session = database.SessionLocal()
-            
-            user_data = {}
-            
-            # 1. Fetch User Info
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                db.close()
+            # Served from the per-user snapshot; backend write paths invalidate it.
+            context = user_context_cache.get(user_id)
+            if context is None:
                 return "Error: User not found."
-            
-            user_data['username'] = user.username
-
-            # 2. Fetch Last 10 Sessions
-            sessions = db.query(YogaSession).filter(YogaSession.user_id == user_id).order_by(YogaSession.date.desc()).limit(10).all()
-            user_data['recent_sessions'] = [
-                {
-                    "pose": s.pose_name,
-                    "accuracy": s.accuracy_score,
-                    "feedback": s.feedback_text,
-                    "notes": s.feedback_notes,
-                    "duration": s.duration,
-                    "date": s.date.isoformat()
-                } for s in sessions
-            ]
-
-            # 3. Fetch Last 5 Journal Entries
-            journals = db.query(JournalEntry).filter(JournalEntry.user_id == user_id).order_by(JournalEntry.date.desc()).limit(5).all()
-            user_data['journal_entries'] = [
-                {
-                    "entry": j.entry_text,
-                    "date": j.date.isoformat()
-                } for j in journals
-            ]
-
-            # 4. Fetch Last 5 Chat Interactions
-            chats = db.query(ChatHistory).filter(ChatHistory.user_id == user_id).order_by(ChatHistory.created_date.desc()).limit(5).all()
-            user_data['recent_chats'] = [
-                {
-                    "user_query": c.user_query,
-                    "bot_response": c.bot_response[:100] + "...", # Truncate response to save tokens
-                    "date": c.created_date.isoformat()
-                } for c in chats
-            ]
-
-            # 5. Fetch Calendar Plans
-            plans = db.query(CalendarPlan).filter(CalendarPlan.user_id == user_id).order_by(CalendarPlan.planned_date.asc()).limit(10).all()
-            user_data['upcoming_plans'] = [
-                {
-                    "title": p.title,
-                    "description": p.description,
-                    "date": p.planned_date.isoformat(),
-                    "status": p.status
-                } for p in plans
-            ]
-
-            db.close()
-            return json.dumps(user_data, indent=2)
+            return context
 
         except Exception as e:
             return f"Database Error: {e}"
@@ -92,52 +41,61 @@ class SQLYogaTool(BaseTool):
 # ----------------------------
 # Agent and Task Definitions
 # ----------------------------
-llm = LLM(
-    model="gemini/gemini-2.5-flash",
-    api_key=GEMINI_API_KEY
-)
+# COACH_VERBOSE=true restores CrewAI's step-by-step console trace (slow; debugging only).
+COACH_VERBOSE = os.getenv("COACH_VERBOSE", "false").lower() in ("1", "true", "yes")
 
 # Instantiate the custom SQL tool
 sql_tool = SQLYogaTool()
 
-# Define the Yoga Assistant Agent
-yoga_assistant_agent = Agent(
-    role="Personal Yoga & Wellness Mentor",
-    goal="Guide the user through their yoga journey with empathy, wisdom, and data-backed insights.",
-    backstory=(
-        "You are a wise and empathetic Yoga Mentor. "
-        "You have access to the user's data (sessions, journals, chats) which provides you with deep context. "
-        "However, you ARE NOT a data reporter. You use this data naturally, like a human coach. "
-        "For simple greetings (hi, hello), respond warmly and concisely. You might briefly acknowledge their mood or a recent streak, but DO NOT provide a full data audit unless it's relevant. "
-        "When giving advice, connect their recent physical accuracy scores with their mental reflections. "
-        "If a user asks for a plan, provide it in the following JSON format inside a code block with the 'plan-json' tag:\n"
-        "```plan-json\n"
-        "[\n"
-        "  {\"title\": \"Morning Flow\", \"description\": \"Focus on breathing\", \"planned_date\": \"2025-12-30T08:00:00Z\"},\n"
-        "  ...\n"
-        "]\n"
-        "```\n"
-        "Always recommend poses that align with their current form and emotional well-being."
-    ),
-    llm=llm,
-    verbose=True,
-    tools=[sql_tool]
+COACH_BACKSTORY = (
+    "You are a wise and empathetic Yoga Mentor. "
+    "You have access to the user's data (sessions, journals, chats) which provides you with deep context. "
+    "However, you ARE NOT a data reporter. You use this data naturally, like a human coach. "
+    "For simple greetings (hi, hello), respond warmly and concisely. You might briefly acknowledge their mood or a recent streak, but DO NOT provide a full data audit unless it's relevant. "
+    "When giving advice, connect their recent physical accuracy scores with their mental reflections. "
+    "If a user asks for a plan, provide it in the following JSON format inside a code block with the 'plan-json' tag:\n"
+    "```plan-json\n"
+    "[\n"
+    "  {\"title\": \"Morning Flow\", \"description\": \"Focus on breathing\", \"planned_date\": \"2025-12-30T08:00:00Z\"},\n"
+    "  ...\n"
+    "]\n"
+    "```\n"
+    "Always recommend poses that align with their current form and emotional well-being."
 )
 
-def crew(user_query: str, user_id: int) -> str:
-    """
-    Orchestrates the CrewAI process to answer a user query with personalization.
-    """
-    
+# The task is a template; `kickoff(inputs=...)` fills in the query and user for each call.
+TASK_DESCRIPTION = (
+    "Connect with user history for user_id={user_id}. "
+    "Respond to the user's query: '{user_query}' "
+    "Use recent session data and journal moods ONLY if it adds value or depth to your answer. "
+    "Be conversational. If the query is just a greeting, be warm and inviting. "
+    "If they ask for advice or show pain, delve deep into their history to find the 'why'. "
+    "Never sound like a robot reading a spreadsheet. Be their Mentor."
+)
+
+
+def _build_crew():
+    llm = LLM(
+        model="gemini/gemini-2.5-flash",
+        api_key=GEMINI_API_KEY,
+        stream=True
+    )
+
+    # Define the Yoga Assistant Agent
+    yoga_assistant_agent = Agent(
+        role="Personal Yoga & Wellness Mentor",
+        goal="Guide the user through their yoga journey with empathy, wisdom, and data-backed insights.",
+        backstory=COACH_BACKSTORY,
+        llm=llm,
+        verbose=COACH_VERBOSE,
+        tools=[sql_tool],
+        # The crew outlives a query; CrewAI's tool cache would keep serving the first history
+        # fetch and bypass user_context_cache invalidation.
+        cache=False
+    )
+
     yoga_analysis_task = Task(
-        description=(
-            f"Connect with user history for user_id={user_id}. "
-            f"Respond to the user's query: '{user_query}' "
-            "Use recent session data and journal moods ONLY if it adds value or depth to your answer. "
-            "Be conversational. If the query is just a greeting, be warm and inviting. "
-            "If they ask for advice or show pain, delve deep into their history to find the 'why'. "
-            "Never sound like a robot reading a spreadsheet. Be their Mentor."
-        ),
+        description=TASK_DESCRIPTION,
         agent=yoga_assistant_agent,
         expected_output="A conversational, personalized response that intelligently leverages history without repetitive data dumping.",
     )
@@ -145,8 +103,43 @@ def crew(user_query: str, user_id: int) -> str:
     my_crew = Crew(
         agents=[yoga_assistant_agent],
         tasks=[yoga_analysis_task],
-        verbose=True
+        verbose=COACH_VERBOSE,
+        cache=False
     )
+    return llm, my_crew
 
-    result = my_crew.kickoff()
-    return result
\ No newline at end of file
+
+# --- Crew Reuse & Streaming ---
+# A Crew is not safe to kick off from two threads at once, so each coach worker thread builds
+# one Agent/Task/Crew on its first query and reuses it afterwards. Streamed LLM chunks are routed
+# back to the caller through the LLM instance that emitted them.
+_thread_state = threading.local()
+_chunk_sinks = {}
+
+
+def _thread_crew():
+    if not hasattr(_thread_state, "crew"):
+        _thread_state.llm, _thread_state.crew = _build_crew()
+    return _thread_state.llm, _thread_state.crew
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _route_stream_chunk(source, event):
+    sink = _chunk_sinks.get(id(source))
+    if sink is not None:
+        sink(event.chunk)
+
+
+def crew(user_query: str, user_id: int, on_chunk=None) -> str:
+    """
+    Orchestrates the CrewAI process to answer a user query with personalization.
+    Blocking; `on_chunk(text)` is called with partial output as the model streams it.
+    """
+    llm, my_crew = _thread_crew()
+    if on_chunk is not None:
+        _chunk_sinks[id(llm)] = on_chunk
+    try:
+        result = my_crew.kickoff(inputs={"user_query": user_query, "user_id": user_id})
+    finally:
+        _chunk_sinks.pop(id(llm), None)
+    return str(result)
@@ -28,6 +28,7 @@ const itemVariants = {
 
 export function Dashboard({ user, backendUrl }) {
     const [sessions, setSessions] = useState([]);
+    const [totals, setTotals] = useState({ total_sessions: 0, average_accuracy: 0 });
     const [streak, setStreak] = useState(0);
     const [loading, setLoading] = useState(true);
 
@@ -37,12 +38,15 @@ export function Dashboard({ user, backendUrl }) {
             if (!token) return;
 
             try {
-                const [sessionsRes, streakRes] = await Promise.all([
-                    fetch(`${backendUrl}/get-sessions/`, { headers: { Authorization: `Bearer ${token}` } }),
+                // Only the latest few sessions are listed; totals come from the precomputed aggregates.
+                const [sessionsRes, progressRes, streakRes] = await Promise.all([
+                    fetch(`${backendUrl}/get-sessions/?limit=3&fields=pose_name,accuracy_score,duration,feedback_text`, { headers: { Authorization: `Bearer ${token}` } }),
+                    fetch(`${backendUrl}/get-progress/?days=1`, { headers: { Authorization: `Bearer ${token}` } }),
                     fetch(`${backendUrl}/get-streak/`, { headers: { Authorization: `Bearer ${token}` } })
                 ]);
 
                 if (sessionsRes.ok) setSessions(await sessionsRes.json());
+                if (progressRes.ok) setTotals(await progressRes.json());
                 if (streakRes.ok) {
                     const data = await streakRes.json();
                     setStreak(data.streak);
@@ -57,9 +61,7 @@ export function Dashboard({ user, backendUrl }) {
         fetchData();
     }, [backendUrl]);
 
-    const avgAccuracy = sessions.length > 0
-        ? Math.round(sessions.reduce((acc, s) => acc + (s.accuracy_score || 0), 0) / sessions.length)
-        : 0;
+    const avgAccuracy = Math.round(totals.average_accuracy || 0);
 
     return (
         <motion.div
@@ -117,7 +119,7 @@ export function Dashboard({ user, backendUrl }) {
                     />
                     <StatCard
                         icon={<Calendar className="w-10 h-10 text-blue-400" />}
-                        value={sessions.length}
+                        value={totals.total_sessions}
                         label="Total Sessions"
                         trend={<Sparkles className="w-6 h-6 text-yellow-400" />}
                         color="from-blue-500/20 to-cyan-500/20"
@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { BookOpen, Sparkles, Send, Heart, Calendar, ArrowRight } from 'lucide-react';
 
+const HISTORY_PAGE_SIZE = 50;
+
 export function Journal({ user, backendUrl }) {
     const [entry, setEntry] = useState('');
     const [history, setHistory] = useState([]);
@@ -20,7 +22,7 @@ export function Journal({ user, backendUrl }) {
             const token = localStorage.getItem('zenflow_token');
             if (!token) return;
             try {
-                const response = await fetch(`${backendUrl}/get-journal-entries/`, {
+                const response = await fetch(`${backendUrl}/get-journal-entries/?limit=${HISTORY_PAGE_SIZE}`, {
                     headers: { Authorization: `Bearer ${token}` }
                 });
                 if (response.ok) setHistory(await response.json());
@@ -44,7 +46,7 @@ export function Journal({ user, backendUrl }) {
             });
             if (response.ok) {
                 setEntry('');
-                const fresh = await fetch(`${backendUrl}/get-journal-entries/`, {
+                const fresh = await fetch(`${backendUrl}/get-journal-entries/?limit=${HISTORY_PAGE_SIZE}`, {
                     headers: { Authorization: `Bearer ${token}` }
                 });
                 if (fresh.ok) setHistory(await fresh.json());
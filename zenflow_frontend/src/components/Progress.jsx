@@ -3,6 +3,8 @@ import { motion } from 'framer-motion';
 import { TrendingUp, Calendar, Heart, Award, ChevronRight } from 'lucide-react';
 import { AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
+const HISTORY_PAGE_SIZE = 50;
+
 export function Progress({ backendUrl }) {
     const [sessions, setSessions] = useState([]);
 
@@ -11,7 +13,7 @@ export function Progress({ backendUrl }) {
             const token = localStorage.getItem('zenflow_token');
             if (!token) return;
             try {
-                const response = await fetch(`${backendUrl}/get-sessions/`, {
+                const response = await fetch(`${backendUrl}/get-sessions/?limit=${HISTORY_PAGE_SIZE}&fields=pose_name,accuracy_score`, {
                     headers: { Authorization: `Bearer ${token}` }
                 });
                 if (response.ok) setSessions(await response.json());